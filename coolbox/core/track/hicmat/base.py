@@ -160,15 +160,10 @@ class HicMatBase(Track, PlotHiCMat, ProcessHicMat):
         raise NotImplementedError
 
     def fetch_window_genome_range(self, gr: GenomeRange, gr2: GenomeRange = None) -> Tuple[GenomeRange, GenomeRange]:
-        from copy import copy
-        fetch_gr = copy(gr)
         dr = self.properties['depth_ratio']
         dr = 1.0 if dr == "full" else dr
         dr = min(1.0, dr + 0.05)
         x = int(gr.length * dr // 2)
-        fetch_gr.start = gr.start - x
-        fetch_gr.end = gr.end + x
-
-        fetch_gr.start = max(fetch_gr.start, 0)
+        fetch_gr = GenomeRange(gr.chrom, max(gr.start - x, 0), gr.end + x)
 
         return fetch_gr, gr2
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 from coolbox.utilities import (
-    split_genome_range, change_chrom_names,
+    split_genome_range,
     GenomeRange, get_logger,
 )
 from coolbox.utilities.bed import tabix_query, build_bedgraph_bgz
@@ -46,7 +46,7 @@ class BedGraph(HistBase):
     def fetch_data(self, gr: GenomeRange, **kwargs) -> pd.DataFrame:
         rows = self.load(gr)
         if len(rows) == 0:
-            gr.chrom = change_chrom_names(gr.chrom)
+            gr.change_chrom_names()
             rows = self.load(gr)
 
         return pd.DataFrame(rows, columns=['chromsome', 'start', 'end', 'score'])
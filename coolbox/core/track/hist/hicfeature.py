@@ -259,14 +259,13 @@ class Virtual4C(HicFeature):
 
     def fetch_data(self, gr: GenomeRange, **kwargs) -> np.ndarray:
         # fetch mean array
-        from copy import copy
         bin_width = self.bin_width
         position = self.position
         binsize = self.hicmat.infer_binsize(gr)
-        window_range = copy(position)
         offset_ = (bin_width - 1) // 2
         assert offset_ >= 0, "bin width must >= 1"
-        window_range.start = window_range.start - offset_ * binsize
-        window_range.end = window_range.end + offset_ * binsize
+        window_range = GenomeRange(position.chrom,
+                                   position.start - offset_ * binsize,
+                                   position.end + offset_ * binsize)
         arr = self.hicmat.fetch_data(window_range, gr2=gr)
         return np.nanmean(arr, axis=0)
@@ -1,6 +1,8 @@
+import os
+import mmap
 import typing as T
 import subprocess as subp
-from functools import partial
+from functools import partial, lru_cache
 from os import path as osp
 import itertools
 
@@ -14,6 +16,35 @@ from .genome import GenomeRange
 
 log = get_logger(__name__)
 
+# threads and buffer used by the sort | bgzip pipelines,
+# sort in C locale(bytewise compare) which is much faster for ASCII data.
+_N_THREADS = min(os.cpu_count() or 1, 8)
+_SORT = f"sort --parallel={_N_THREADS} -S 1G"
+_BGZIP = f"bgzip --threads {_N_THREADS}"
+
+
+def _sort_env():
+    return {**os.environ, 'LC_ALL': 'C'}
+
+
+def _iter_lines(file_name):
+    """Iterate over the lines(bytes) of a file, plain files are scanned with mmap."""
+    with open(file_name, 'rb') as f:
+        if f.read(2) != b'\x1f\x8b':
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                i, n = 0, len(mm)
+                while i < n:
+                    j = mm.find(b'\n', i)
+                    if j == -1:
+                        j = n
+                    yield mm[i:j]
+                    i = j + 1
+            return
+    with opener(file_name, buffer_size=1 << 20) as f:
+        yield from f
+
 
 def file_to_intervaltree(file_name):
     """
@@ -36,7 +67,6 @@ def file_to_intervaltree(file_name):
     # iterate over a BED like file
     # saving the data into an interval tree
     # for quick retrieval
-    file_h = opener(file_name)
     line_number = 0
     valid_intervals = 0
     prev_chrom = None
@@ -46,11 +76,11 @@ def file_to_intervaltree(file_name):
     min_value = np.inf
     max_value = -np.inf
 
-    for line in file_h.readlines():
+    for line in _iter_lines(file_name):
         line_number += 1
-        line = to_string(line)
-        if line.startswith('browser') or line.startswith('track') or line.startswith('#'):
+        if line.startswith((b'browser', b'track', b'#')):
             continue
+        line = to_string(line)
         fields = line.strip().split('\t')
         try:
             chrom, start, end = fields[0:3]
@@ -101,7 +131,6 @@ def file_to_intervaltree(file_name):
 
     if valid_intervals == 0:
         log.warning("No valid intervals were found in file {}".format(file_name))
-    file_h.close()
 
     return interval_tree, min_value, max_value
 
@@ -352,8 +381,8 @@ class ReadBed(object):
 def bgz_bed(bed_path, bgz_path):
     cmd = ""
     cmd += "zcat" if bed_path.endswith(".gz") else "cat"
-    subp.check_call(cmd + f" {bed_path} | sort -k1,1 -k2,2n | bgzip > {bgz_path}",
-                    shell=True)
+    subp.check_call(cmd + f" {bed_path} | {_SORT} -k1,1 -k2,2n | {_BGZIP} > {bgz_path}",
+                    shell=True, env=_sort_env())
     return bgz_path
 
 
@@ -362,12 +391,30 @@ def index_bed(bgz_path):
     subp.check_call(cmd)
 
 
+@lru_cache(maxsize=128)
+def _tabix_file(filename, mtime):
+    """Open a tabix indexed file with pysam, keep the handle(and index) across queries.
+
+    `mtime` is only a part of the cache key, a rebuilt file is opened again.
+    """
+    import pysam
+    return pysam.TabixFile(filename)
+
+
 def tabix_query(filename, chrom, start, end, split=True):
     """Call tabix and generate an array of strings for each line it returns."""
     query = '{}:{}-{}'.format(chrom, start, end)
-    p = subp.Popen(['tabix', '-f', filename, query], stdout=subp.PIPE)
-    for line in p.stdout:
-        line = line.decode('utf-8')
+    try:
+        tbx = _tabix_file(filename, osp.getmtime(filename))
+    except ImportError:
+        p = subp.Popen(['tabix', '-f', filename, query], stdout=subp.PIPE)
+        lines = (line.decode('utf-8') for line in p.stdout)
+    else:
+        if chrom not in tbx.contigs:
+            return
+        # the handle is shared, give each(lazy) query its own iterator
+        lines = tbx.fetch(region=query, multiple_iterators=True)
+    for line in lines:
         if not split:
             yield line
         else:
@@ -421,8 +468,8 @@ def build_snp_index(file, col_chrom, col_pos):
     else:
         bgz_file = file + '.bgz'
         cmd = "zcat" if file.endswith('.gz') else "cat"
-        cmd += f" {file} | sort -k{c},{c} -k{p},{p}n | bgzip > {bgz_file}"
-        subp.check_call(cmd, shell=True)
+        cmd += f" {file} | {_SORT} -k{c},{c} -k{p},{p}n | {_BGZIP} > {bgz_file}"
+        subp.check_call(cmd, shell=True, env=_sort_env())
     index_file = bgz_file + '.tbi'
     if not osp.exists(index_file):
         cmd = ['tabix', '-s', str(c), '-b', str(p), '-e', str(p), bgz_file]
@@ -432,8 +479,8 @@ def build_snp_index(file, col_chrom, col_pos):
 
 def bgz_bedpe(bedpe_path, bgz_path):
     if not osp.exists(bgz_path):
-        cmd = f"sort -k1,1 -k4,4 -k2,2n -k5,5n {bedpe_path} | bgzip > {bgz_path}"
-        subp.check_call(cmd, shell=True)
+        cmd = f"{_SORT} -k1,1 -k4,4 -k2,2n -k5,5n {bedpe_path} | {_BGZIP} > {bgz_path}"
+        subp.check_call(cmd, shell=True, env=_sort_env())
 
 
 def index_bedpe(bgz_path):
@@ -441,6 +488,16 @@ def index_bedpe(bgz_path):
     subp.check_call(cmd)
 
 
+@lru_cache(maxsize=128)
+def _pairix_file(filename, mtime):
+    """Open a pairix indexed file with pypairix, keep the handle(and index) across queries.
+
+    `mtime` is only a part of the cache key, a rebuilt file is opened again.
+    """
+    import pypairix
+    return pypairix.open(filename)
+
+
 def pairix_query(bgz_file, query: GenomeRange, second: T.Optional[GenomeRange] = None,
                  open_region: bool = False, split: bool = True):
     if second:
@@ -448,14 +505,20 @@ def pairix_query(bgz_file, query: GenomeRange, second: T.Optional[GenomeRange] =
     else:
         if open_region:
             query = f"{query}|{query.chrom}"
-    cmd = ['pairix', str(bgz_file), str(query)]
-    p = subp.Popen(cmd, stdout=subp.PIPE)
-    for line in p.stdout:
-        line = line.decode('utf-8')
+    query = str(query)
+    try:
+        px = _pairix_file(str(bgz_file), osp.getmtime(bgz_file))
+    except ImportError:
+        cmd = ['pairix', str(bgz_file), query]
+        p = subp.Popen(cmd, stdout=subp.PIPE)
+        rows = (line.decode('utf-8').strip().split('\t') for line in p.stdout)
+    else:
+        rows = px.querys2D(query) if '|' in query else px.querys(query)
+    for row in rows:
         if not split:
-            yield line
+            yield '\t'.join(row) + '\n'
         else:
-            yield line.strip().split('\t')
+            yield row
 
 
 def process_bedpe(path):
@@ -471,8 +534,8 @@ def process_bedpe(path):
 
 def bgz_pairs(pairs_path, bgz_path):
     if not osp.exists(bgz_path):
-        cmd = f"grep -v '#' {pairs_path} | sort -k2,2 -k4,4 -k3,3n -k5,5n | bgzip > {bgz_path}"
-        subp.check_call(cmd, shell=True)
+        cmd = f"grep -v '#' {pairs_path} | {_SORT} -k2,2 -k4,4 -k3,3n -k5,5n | {_BGZIP} > {bgz_path}"
+        subp.check_call(cmd, shell=True, env=_sort_env())
 
 
 def index_pairs(bgz_path):
@@ -492,8 +555,8 @@ def process_pairs(path):
 
 
 def process_gtf(gtf_path, out_path):
-    cmd = f'(grep ^"#" {gtf_path}; grep -v ^"#" {gtf_path} | sort -k1,1 -k4,4n) | bgzip > {out_path}'
-    subp.check_call(cmd, shell=True)
+    cmd = f'(grep ^"#" {gtf_path}; grep -v ^"#" {gtf_path} | {_SORT} -k1,1 -k4,4n) | {_BGZIP} > {out_path}'
+    subp.check_call(cmd, shell=True, env=_sort_env())
 
 
 def gtf_gz_to_bgz(gz, bgz):
@@ -1,6 +1,8 @@
 import re
 from numpydoc.docscrape import NumpyDocString
 
+_VAR_PATTERN = re.compile(r"\${.*?}")
+
 
 def paste_doc(lookup_dict):
     """
@@ -12,7 +14,7 @@ def paste_doc(lookup_dict):
         old_doc = obj.__doc__
         doc = ""
         old_e = 0
-        for match in re.finditer("\${.*?}", old_doc):
+        for match in _VAR_PATTERN.finditer(old_doc):
             s, e = match.start(), match.end()
             doc += old_doc[old_e:s]
             content = old_doc[s + 2:e - 1]
@@ -1,3 +1,6 @@
+from functools import lru_cache
+
+
 def cm2inch(*tupl):
     """
     convert length unit from cm to inch.
@@ -57,11 +60,7 @@ def hex2rgb(color_hex):
     >>> hex2rgb('#819a46')
     (129, 154, 70)
     """
-    code = color_hex[1:]
-    r = int(code[0:2], 16)
-    g = int(code[2:4], 16)
-    b = int(code[4:6], 16)
-    return r, g, b
+    return tuple(bytes.fromhex(color_hex[1:7]))
 
 
 def shiftedColorMap(cmap, start=0, midpoint=0.5, stop=1.0, name='shiftedcmap'):
@@ -89,16 +88,25 @@ def shiftedColorMap(cmap, start=0, midpoint=0.5, stop=1.0, name='shiftedcmap'):
           `midpoint` and 1.0.
 
     '''
-    import numpy as np
     import matplotlib
-    import matplotlib.pyplot as plt
 
-    cdict = {
-        'red': [],
-        'green': [],
-        'blue': [],
-        'alpha': []
-    }
+    cmap_name = cmap if isinstance(cmap, str) else cmap.name
+    if cmap_name in matplotlib.colormaps:
+        # registered colormap, reuse the shifted result of the name,
+        # a copy for each caller, they may change the bad/under/over colors of it
+        return _shifted_cmap_cached(cmap_name, start, midpoint, stop, name).copy()
+    return _shifted_cmap(cmap, start, midpoint, stop, name)
+
+
+@lru_cache(maxsize=64)
+def _shifted_cmap_cached(cmap_name, start, midpoint, stop, name):
+    import matplotlib
+    return _shifted_cmap(matplotlib.colormaps[cmap_name], start, midpoint, stop, name)
+
+
+def _shifted_cmap(cmap, start, midpoint, stop, name):
+    import numpy as np
+    import matplotlib
 
     # regular index to compute the colors
     reg_index = np.linspace(start, stop, 257)
@@ -109,16 +117,15 @@ def shiftedColorMap(cmap, start=0, midpoint=0.5, stop=1.0, name='shiftedcmap'):
         np.linspace(midpoint, 1.0, 129, endpoint=True)
     ])
 
-    for ri, si in zip(reg_index, shift_index):
-        r, g, b, a = cmap(ri)
-
-        cdict['red'].append((si, r, r))
-        cdict['green'].append((si, g, g))
-        cdict['blue'].append((si, b, b))
-        cdict['alpha'].append((si, a, a))
+    # evaluate all colors in one call
+    rgba = cmap(reg_index)
+    cdict = {
+        key: [(si, c, c) for si, c in zip(shift_index, rgba[:, i])]
+        for i, key in enumerate(('red', 'green', 'blue', 'alpha'))
+    }
 
     newcmap = matplotlib.colors.LinearSegmentedColormap(name, cdict)
-    plt.register_cmap(cmap=newcmap)
+    matplotlib.colormaps.register(newcmap, force=True)
 
     return newcmap
 
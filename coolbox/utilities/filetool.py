@@ -1,11 +1,17 @@
+import io
 import os
 import os.path as osp
-import uuid
+import tempfile
+from functools import lru_cache
 
+# read buffer size of the file handles returned by `opener`
+_BUFFER_SIZE = 128 * 1024
 
-def opener(filename):
+
+def opener(filename, buffer_size=_BUFFER_SIZE):
     """
-    Determines if a file is compressed or not
+    Determines if a file is compressed or not, open it as a buffered binary stream
+    with the read buffer of `buffer_size` bytes.
 
     >>> import gzip
     >>> msg = "hello blablabla"
@@ -23,7 +29,9 @@ def opener(filename):
     <class '_io.BufferedReader'>
     >>> test_gzip = opener(tmp_f_gzip.name)
     >>> type(test_gzip)
-    <class 'gzip.GzipFile'>
+    <class '_io.BufferedReader'>
+    >>> to_string(test_gzip.read())
+    'hello blablabla'
 
     >>> test_raw.close()
     >>> test_gzip.close()
@@ -33,14 +41,27 @@ def opener(filename):
     >>> os.remove(test_gzip.name)
 
     """
-    import gzip
-    f = open(filename, 'rb')
-    if f.read(2) == b'\x1f\x8b':
-        f.seek(0)
-        return gzip.GzipFile(fileobj=f)
-    else:
-        f.seek(0)
-        return f
+    try:
+        # ISA-L's inflate is much faster than zlib's, use it when available
+        from isal.igzip import IGzipFile as GzipFile
+    except ImportError:
+        from gzip import GzipFile
+    if not is_gzip(filename):
+        return open(filename, 'rb', buffering=buffer_size)
+    return io.BufferedReader(GzipFile(filename), buffer_size=buffer_size)
+
+
+def is_gzip(filename):
+    """Determines if a file is gzip compressed, by the suffix or the gzip magic number."""
+    # trust the suffix, otherwise sniff the gzip magic number with a raw fd
+    if str(filename).endswith(('.gz', '.bgz')):
+        return True
+    fd = os.open(filename, os.O_RDONLY)
+    try:
+        magic = os.read(fd, 2)
+    finally:
+        os.close(fd)
+    return magic == b'\x1f\x8b'
 
 
 def to_string(s):
@@ -54,12 +75,13 @@ def to_string(s):
     >>> to_string([b'hello', b'world'])
     ['hello', 'world']
     """
-    if isinstance(s, str):
+    t = type(s)
+    if t is str:
         return s
-    if isinstance(s, bytes):
+    if t is bytes or isinstance(s, bytes):
         return s.decode('ascii')
-    if isinstance(s, list):
-        return [to_string(x) for x in s]
+    if t is list or isinstance(s, list):
+        return list(map(to_string, s))
     return s
 
 
@@ -72,12 +94,13 @@ def to_bytes(s):
     >>> to_bytes(['hello', 'world'])
     [b'hello', b'world']
     """
-    if isinstance(s, bytes):
+    t = type(s)
+    if t is bytes:
         return s
-    if isinstance(s, str):
-        return bytes(s, 'ascii')
-    if isinstance(s, list):
-        return [to_bytes(x) for x in s]
+    if t is str or isinstance(s, str):
+        return s.encode('ascii')
+    if t is list or isinstance(s, list):
+        return list(map(to_bytes, s))
     return s
 
 
@@ -85,19 +108,24 @@ def get_tmp_dir(name=".coolbox"):
     """Return the path to coolbox temporary directory.
     If the file not exists, will make it.
     """
-    path = osp.join(osp.realpath(os.curdir), name)
-    if not osp.exists(path):
-        os.mkdir(path)
+    path = _make_tmp_dir(os.getcwd(), name)
+    if not osp.isdir(path):  # removed after cached
+        _make_tmp_dir.cache_clear()
+        path = _make_tmp_dir(os.getcwd(), name)
+    return path
+
+
+@lru_cache(maxsize=16)
+def _make_tmp_dir(cwd, name):
+    path = osp.join(osp.realpath(cwd), name)
+    os.makedirs(path, exist_ok=True)
     return path
 
 
 def get_uniq_tmp_file(prefix="", suffix='.svg', dirname=".coolbox"):
-    """Return the path to a unique(not exists) temporary file."""
-    tmp_dir = get_tmp_dir(dirname)
-    while True:
-        short_uuid = str(uuid.uuid1()).split('-')[0]
-        file = prefix + short_uuid + suffix
-        path = osp.join(tmp_dir, file)
-        if not osp.exists(path):
-            break
+    """Return the path to a unique temporary file.
+    The file is created(empty) atomically to reserve the name.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix=prefix, dir=get_tmp_dir(dirname))
+    os.close(fd)
     return path
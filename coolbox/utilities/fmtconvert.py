@@ -2,13 +2,19 @@
 format convert
 """
 
+import io
+import os.path as osp
 import collections
-from .filetool import opener, to_string
+
+from .filetool import opener, is_gzip, to_string
 
 _fields_rg = ("bin", "name", "chrom", "strand", "txStart", "txEnd",
               "cdsStart", "cdsEnd", "exonCount", "exonStart", "exonEnds",
               "score", "name2", "cdsStartStat", "cdsEndStat", "exonFrames")
 
+# minimal bytes of plain text refGene converted by each worker process
+_PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
 _refGeneRec = collections.namedtuple("refGeneRec", _fields_rg)
 
 
@@ -28,40 +34,97 @@ class refGeneRec(_refGeneRec):
         item_rgb = "0"
 
         block_count = self.exonCount
-        block_starts = self.offset_zero(self.exonStart, start) + ","
-        block_ends = self.exonEnds
-        block_sizes = self.get_exons_size(self.exonStart, block_ends) + ","
-
-        bed12_item = (chrom, start, end, name, score, strand, thick_start, thick_end, item_rgb,
-                      block_count, block_sizes, block_starts)
+        # parse exon starts/ends only once
+        offset = int(start)
+        exon_starts = self.parse_block(self.exonStart)
+        exon_ends = self.parse_block(self.exonEnds)
+        block_starts = ",".join([str(s - offset) for s in exon_starts]) + ","
+        block_sizes = ",".join([str(e - s) for s, e in zip(exon_starts, exon_ends)]) + ","
 
-        return "\t".join(bed12_item)
+        return (f"{chrom}\t{start}\t{end}\t{name}\t{score}\t{strand}\t{thick_start}\t{thick_end}\t"
+                f"{item_rgb}\t{block_count}\t{block_sizes}\t{block_starts}")
 
     def to_line(self):
         return "\t".join(self)
 
     @staticmethod
-    def offset_zero(block, offset):
-        offset = int(offset)
-        block = [int(i) for i in block.split(",") if i]
-        block = [str(i - offset) for i in block]
-        return ",".join(block)
-
-    @staticmethod
-    def get_exons_size(exons_start, exons_end):
-        starts = exons_start.split(",")
-        starts = [int(i) for i in starts if i]
-        ends = exons_end.split(",")
-        ends = [int(i) for i in ends if i]
-        sizes = [ends[i] - starts[i] for i, _ in enumerate(starts)]
-        return ",".join(str(i) for i in sizes)
-
-
-def refgene_txt_to_bed12(txt_file, bed_file):
-    with opener(txt_file) as f_in, open(bed_file, 'w') as f_out:
-        for line in f_in:
-            line = to_string(line)
-            items = line.strip().split("\t")
-            refg_rec = refGeneRec._make(items)
-            out_line = refg_rec.to_bed12_line() + "\n"
-            f_out.write(out_line)
+    def parse_block(block):
+        """Parse a comma separated(may with tailing comma) integer list."""
+        return [int(i) for i in block.split(",") if i]
+
+
+def _convert_refgene(f_in, f_out, batch_size):
+    """Convert refGene lines from binary stream `f_in`, write bed12 lines in batches."""
+    make = refGeneRec._make
+    buf = []
+    for line in f_in:
+        items = to_string(line).strip().split("\t")
+        buf.append(make(items).to_bed12_line())
+        if len(buf) >= batch_size:
+            f_out.write("\n".join(buf) + "\n")
+            buf.clear()
+    if buf:
+        f_out.write("\n".join(buf) + "\n")
+
+
+def _convert_refgene_range(txt_file, start, end, batch_size):
+    """Convert the lines within the byte range [start, end) of a plain text refGene file."""
+    with open(txt_file, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    f_out = io.StringIO()
+    _convert_refgene(io.BytesIO(data), f_out, batch_size)
+    return f_out.getvalue()
+
+
+def _line_aligned_ranges(path, n):
+    """Split a file into at most n byte ranges, each boundary at the start of a line."""
+    size = osp.getsize(path)
+    offsets = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, n):
+            f.seek(size * i // n)
+            f.readline()
+            offsets.append(min(f.tell(), size))
+    offsets.append(size)
+    offsets = sorted(set(offsets))
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
+def refgene_txt_to_bed12(txt_file, bed_file, batch_size=4096, n_workers=1):
+    """
+    Convert refGene txt file to bed12 file.
+
+    Parameters
+    ----------
+    txt_file : str
+        Path to the refGene file, plain text or gzip compressed.
+    bed_file : str
+        Path to the output bed12 file.
+    batch_size : int
+        Number of bed12 lines written at a time.
+    n_workers : int
+        Number of worker processes. Plain text input is split to line aligned
+        byte ranges(at least `_PARALLEL_MIN_BYTES` each) converted in parallel;
+        gzip input is always converted serially.
+    """
+    if n_workers > 1 and not is_gzip(txt_file):
+        # small files are not worth the start up of the worker processes
+        n_workers = min(n_workers, osp.getsize(txt_file) // _PARALLEL_MIN_BYTES)
+    else:
+        n_workers = 1
+    if n_workers <= 1:
+        with opener(txt_file) as f_in, open(bed_file, 'w', buffering=1 << 20) as f_out:
+            _convert_refgene(f_in, f_out, batch_size)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    ranges = _line_aligned_ranges(txt_file, n_workers)
+    with ProcessPoolExecutor(n_workers) as pool, \
+            open(bed_file, 'w', buffering=1 << 20) as f_out:
+        futures = [
+            pool.submit(_convert_refgene_range, txt_file, start, end, batch_size)
+            for start, end in ranges
+        ]
+        for fu in futures:
+            f_out.write(fu.result())
@@ -1,6 +1,7 @@
+import io
 from typing import Iterator, Union
 from .logtools import get_logger
-from .filetool import opener, to_string
+from .filetool import opener
 
 log = get_logger(__name__)
 
@@ -11,7 +12,9 @@ def to_gr(obj):
 
     >>> gr = to_gr("chr1:0-1000")
     >>> (gr.chrom, gr.start, gr.end)
-    ("chr1", 0, 1000)
+    ('chr1', 0, 1000)
+    >>> to_gr(gr) is gr
+    True
 
     """
     if type(obj) is GenomeRange:
@@ -37,6 +40,8 @@ class GenomeRange(object):
 
     """
 
+    __slots__ = ('_chrom', '_start', '_end', '_str', '_hash')
+
     def __init__(self, *args):
         """
         >>> range1 = GenomeRange("chr1", 1000, 2000)
@@ -47,6 +52,7 @@ class GenomeRange(object):
         ('chr2', 2000, 4000)
         >>> range3 = GenomeRange(range2)
         >>> tuple(range3)
+        ('chr2', 2000, 4000)
         >>> range4 = GenomeRange("chr1", 2000, 1000)
         Traceback (most recent call last):
         ...
@@ -54,7 +60,8 @@ class GenomeRange(object):
         """
         if len(args) == 1:
             if isinstance(args[0], GenomeRange):
-                chrom, start, end = tuple(args[0])
+                other = args[0]
+                chrom, start, end = other.chrom, other.start, other.end
             # str format
             else:
                 chrom, start, end = GenomeRange.parse_region_string(args[0])
@@ -70,9 +77,39 @@ class GenomeRange(object):
             raise ValueError("Please check that the region end is larger than the region start. "
                              "Values given: start: {}, end: {}".format(start, end))
 
-        self.chrom = chrom
-        self.start = start
-        self.end = end
+        self._chrom = chrom
+        self._start = start
+        self._end = end
+        # memoized str and hash, reset by the setters of the fields
+        self._str = None
+        self._hash = None
+
+    @property
+    def chrom(self):
+        return self._chrom
+
+    @chrom.setter
+    def chrom(self, value):
+        self._chrom = value
+        self._str = self._hash = None
+
+    @property
+    def start(self):
+        return self._start
+
+    @start.setter
+    def start(self, value):
+        self._start = value
+        self._str = self._hash = None
+
+    @property
+    def end(self):
+        return self._end
+
+    @end.setter
+    def end(self, value):
+        self._end = value
+        self._str = self._hash = None
 
     def __iter__(self) -> Iterator[Union[str, int]]:
         yield self.chrom
@@ -97,24 +134,21 @@ class GenomeRange(object):
 
         >>> GenomeRange.parse_region_string("chr1:10-20")
         ('chr1', 10, 20)
+        >>> GenomeRange.parse_region_string("chr1: 1,000 - 2,000")
+        ('chr1', 1000, 2000)
         >>> GenomeRange.parse_region_string("chr1:0")
         Traceback (innermost last):
          ...
-        ValueError: Failure to parse region string, please check that region format should be like "chr:start-end".
+        ValueError: Failure to parse region string chr1:0, please check that region format should be like "chr:start-end".
         """
         try:
             # separate the chromosome name and the location using the ':' character
             chrom, position = region_string.strip().split(":")
-
             # clean up the position
             for char in ",.;|!{}()":
                 position = position.replace(char, '')
-
-            position_list = position.split("-")
-            region_start = int(position_list[0])
-            region_end = int(position_list[1])
-            return chrom, region_start, region_end
-
+            start, end, *_ = position.split("-")
+            return chrom, int(start), int(end)
         except Exception:
             raise ValueError(f"Failure to parse region string {region_string}, please check that region format "
                              f"should be like \"chr:start-end\".")
@@ -149,10 +183,14 @@ class GenomeRange(object):
         >>> GenomeRange("chr1:1000-2000") == GenomeRange("1:1000-2000")
         False
         """
+        if isinstance(other, GenomeRange):
+            return self.chrom == other.chrom and self.start == other.start and self.end == other.end
         return str(self) == str(other)
 
     def __hash__(self):
-        return hash(str(self))
+        if self._hash is None:
+            self._hash = hash((self._chrom, self._start, self._end))
+        return self._hash
 
     def __contains__(self, another):
         if another.chrom != self.chrom:
@@ -162,7 +200,9 @@ class GenomeRange(object):
         return another.end <= self.end
 
     def __str__(self) -> str:
-        return f"{self.chrom}:{self.start}-{self.end}"
+        if self._str is None:
+            self._str = f"{self._chrom}:{self._start}-{self._end}"
+        return self._str
 
     def __repr__(self) -> str:
         return f"GenomeRange('{self}')"
@@ -196,9 +236,21 @@ class GenomeLength(dict):
         self.parse_file(length_file)
 
     def parse_file(self, length_file):
-        with opener(length_file) as f:
-            for idx, line in enumerate(f):
-                line = to_string(line)
+        import pandas as pd
+        try:
+            with opener(length_file) as f:
+                df = pd.read_csv(f, sep=r'\s+', header=None, usecols=[0, 1],
+                                 dtype={0: str, 1: 'int64'})
+        except ValueError:
+            # malformed file, parse it line by line to report the bad lines
+            self._parse_file_lines(length_file)
+        else:
+            self.update(zip(df[0], df[1].tolist()))
+
+    def _parse_file_lines(self, length_file):
+        with io.TextIOWrapper(opener(length_file), encoding='ascii') as f:
+            lines = (line for chunk in iter(lambda: f.readlines(65536), []) for line in chunk)
+            for idx, line in enumerate(lines):
                 chrom, length, *_ = line.strip().split()
                 try:
                     length = int(length)
@@ -213,11 +265,8 @@ class GenomeLength(dict):
 
         (both start and end position is one based.)
         """
-        if genome_range.chrom not in self:
-            return False
-        if genome_range.start < 1:
-            return False
-        return genome_range.end <= self[genome_range.chrom]
+        length = self.get(genome_range.chrom)
+        return length is not None and genome_range.start >= 1 and genome_range.end <= length
 
     def bound_range(self, genome_range):
         """
@@ -227,17 +276,16 @@ class GenomeLength(dict):
         """
         if self.check_range(genome_range):
             return genome_range
-        chrom, start, end = "", 0, 0
 
-        if genome_range.chrom not in self:
+        chrom = genome_range.chrom
+        length = self.get(chrom)
+        if length is None:
             raise ValueError("{} not in chromosome file: {}".format(
-                genome_range.chrom, self.length_file))
-        else:
-            chrom = genome_range.chrom
+                chrom, self.length_file))
 
         start = max(genome_range.start, 1)
-        if genome_range.end > self[genome_range.chrom]:
-            end = self[genome_range.chrom]
+        if genome_range.end > length:
+            end = length
             if start >= end:
                 start = end - genome_range.length
                 start = max(start, 1)
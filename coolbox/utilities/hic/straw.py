@@ -16,6 +16,8 @@ Example:
    result = matrixObj.getDataFromBinRegion(0,500,0,500)
    for i in range(len(result[0])):
 ...   print("{0}\t{1}\t{2}".format(result[0][i], result[1][i], result[2][i]))
+   matrixObj.close()
+   strawObj.close()  # or use them as context managers
 
 See https://github.com/theaidenlab/straw/wiki/Python for more documentation
 """
@@ -24,27 +26,97 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 __author__ = "Yue Wu, Neva Durand, Yossi Eliaz, Muhammad Shamim, Erez Aiden"
 __license__ = "MIT"
 
+import collections
 import struct
 import zlib
 import requests
 import io
 import concurrent.futures
 import math
+import mmap
+import os
 import sys
+import threading
+
+import numpy as np
+
+try:
+    # libdeflate binding, faster than zlib for one-shot decompression
+    import deflate
+except ImportError:
+    deflate = None
+
+_CSTR_CHUNK = 4096
+# precompiled structs of the .hic fields
+_INT = struct.Struct('<i')
+_LONG = struct.Struct('<q')
+_DOUBLE = struct.Struct('<d')
+_POS_SIZE = struct.Struct('<qi')  # (filePosition, sizeInBytes)
+_ZOOM_HEAD = struct.Struct('<i4fiii')  # (chr1 index, 4 float stats, binSize, blockBinCount, blockColumnCount)
+_BLOCK_ENTRY = struct.Struct('<iqi')  # (blockNumber, filePosition, blockSizeInBytes)
+_BLOCK_HEAD = struct.Struct('<iiibb')  # (nRecords, binXOffset, binYOffset, useShort, type)
+_SHORT = struct.Struct('<h')
+_ROW_HEAD = struct.Struct('<hh')  # (y, colCount)
+_DENSE_HEAD = struct.Struct('<ih')  # (nPts, w)
+# max gap(in bytes) between two blocks fetched in one http range request
+_MAX_RANGE_GAP = 64 * 1024
+# size of the http range fetched each time while reading the header
+_RANGE_CHUNK = 64 * 1024
+# max threads fetching blocks of each normalizedmatrix
+_IO_WORKERS = 8
+# max bytes of decoded blocks cached by each normalizedmatrix
+_BLOCK_CACHE_BYTES = 64 * 1024 * 1024
+# give up libdeflate and fall back to zlib for blocks inflating larger than this
+_MAX_INFLATE_SIZE = 1024 * 1024 * 1024
 
 
 def __readcstr(f):
     """ Helper function for reading in C-style string from file
     """
-    buf = b""
-    while True:
-        b = f.read(1)
-        if b is None or b == b"\0":
-            return buf.decode("utf-8")
-        elif b == "":
+    if isinstance(f, io.BytesIO):
+        # scan the underlying buffer directly
+        buf = f.getvalue()
+        start = f.tell()
+        end = buf.find(b"\0", start)
+        if end < 0:
             raise EOFError("Buffer unexpectedly empty while trying to read null-terminated string")
-        else:
-            buf += b
+        f.seek(end + 1)
+        return buf[start:end].decode("utf-8")
+
+    buf = bytearray()
+    if hasattr(f, "peek"):
+        # buffered reader, look for NUL in the buffered bytes
+        while True:
+            chunk = f.peek(_CSTR_CHUNK)
+            if not chunk:
+                raise EOFError("Buffer unexpectedly empty while trying to read null-terminated string")
+            idx = chunk.find(b"\0")
+            if idx >= 0:
+                buf += f.read(idx + 1)
+                return buf[:-1].decode("utf-8")
+            buf += f.read(len(chunk))
+    elif f.seekable():
+        while True:
+            chunk = f.read(_CSTR_CHUNK)
+            if not chunk:
+                raise EOFError("Buffer unexpectedly empty while trying to read null-terminated string")
+            idx = chunk.find(b"\0")
+            if idx >= 0:
+                buf += chunk[:idx]
+                # give back the bytes after NUL
+                f.seek(idx + 1 - len(chunk), io.SEEK_CUR)
+                return buf.decode("utf-8")
+            buf += chunk
+    else:
+        # unseekable stream, e.g. raw http response
+        while True:
+            b = f.read(1)
+            if b is None or b == b"\0":
+                return buf.decode("utf-8")
+            elif b == b"":
+                raise EOFError("Buffer unexpectedly empty while trying to read null-terminated string")
+            else:
+                buf += b
 
 
 readcstr = __readcstr
@@ -110,69 +182,58 @@ def read_metadata(infile, verbose=False):
                 Fragment-delimited resolutions (list).
     """
     metadata = {}
-    import io
     import struct
     if (infile.startswith("http")):
-        # try URL first. 100K should be sufficient for header
-        headers = {'range': 'bytes=0-100000', 'x-amz-meta-requester': 'straw'}
-        s = requests.Session()
-        r = s.get(infile, headers=headers)
-        if (r.status_code >= 400):
+        # fetch the header with ranges on demand
+        req = BufferedRangeReader(infile)
+        if (req.status_code >= 400):
             print("Error accessing " + infile)
-            print("HTTP status code " + str(r.status_code))
+            print("HTTP status code " + str(req.status_code))
             sys.exit(1)
-        req = io.BytesIO(r.content)
-        myrange = r.headers['content-range'].split('/')
-        totalbytes = myrange[1]
     else:
         req = open(infile, 'rb')
     magic_string = struct.unpack('<3s', req.read(3))[0]
     req.read(1)
     if (magic_string != b"HIC"):
         sys.exit('This does not appear to be a HiC file magic string is incorrect')
-    version = struct.unpack('<i', req.read(4))[0]
+    version = _INT.unpack(req.read(4))[0]
     metadata['HiC version'] = version
-    masterindex = struct.unpack('<q', req.read(8))[0]
+    masterindex = _LONG.unpack(req.read(8))[0]
     metadata['Master index'] = masterindex
-    genome = ""
-    c = req.read(1).decode("utf-8")
-    while (c != '\0'):
-        genome += c
-        c = req.read(1).decode("utf-8")
-    metadata['Genome ID'] = genome
+    metadata['Genome ID'] = __readcstr(req)
     if (version > 8):
-        nvi = struct.unpack('<q', req.read(8))[0]
-        nvisize = struct.unpack('<q', req.read(8))[0]
+        nvi = _LONG.unpack(req.read(8))[0]
+        nvisize = _LONG.unpack(req.read(8))[0]
         metadata['NVI'] = nvi
         metadata['NVI size'] = nvisize
     ## read and throw away attribute dictionary (stats+graphs)
-    nattributes = struct.unpack('<i', req.read(4))[0]
+    nattributes = _INT.unpack(req.read(4))[0]
     d = {}
     for x in range(0, nattributes):
         key = __readcstr(req)
         value = __readcstr(req)
         d[key] = value
     metadata['Attribute dictionary'] = d
-    nChrs = struct.unpack('<i', req.read(4))[0]
+    nChrs = _INT.unpack(req.read(4))[0]
     d = {}
     for x in range(0, nChrs):
         key = __readcstr(req)
         if (version > 8):
-            value = struct.unpack('q', req.read(8))[0]
+            value = _LONG.unpack(req.read(8))[0]
         else:
-            value = struct.unpack('<i', req.read(4))[0]
+            value = _INT.unpack(req.read(4))[0]
         d[key] = value
     metadata["Chromosomes"] = d
-    nBpRes = struct.unpack('<i', req.read(4))[0]
+    nBpRes = _INT.unpack(req.read(4))[0]
     l = []
     for x in range(0, nBpRes):
-        res = struct.unpack('<i', req.read(4))[0]
+        res = _INT.unpack(req.read(4))[0]
         l.append(res)
     metadata["Base pair-delimited resolutions"] = l
-    nFrag = struct.unpack('<i', req.read(4))[0]
+    nFrag = _INT.unpack(req.read(4))[0]
     l = []
     for x in range(0, nFrag):
-        res = struct.unpack('<i', req.read(4))[0]
+        res = _INT.unpack(req.read(4))[0]
         l.append(res)
     metadata["Fragment-delimited resolutions"] = l
     for k in metadata:
@@ -194,17 +255,13 @@ def readHeader(infile, is_synapse):
     """
 
     if infile.startswith("http"):
-        # try URL first. 100K should be sufficient for header
-        headers = getHttpHeader('bytes=0-100000', is_synapse)
-        s = requests.Session()
-        r = s.get(infile, headers=headers)
-        if r.status_code >= 400:
+        # fetch the header with ranges on demand
+        req = BufferedRangeReader(infile, is_synapse)
+        if req.status_code >= 400:
             print("Error accessing " + infile)
-            print("HTTP status code " + str(r.status_code))
+            print("HTTP status code " + str(req.status_code))
             return -1
-        req = io.BytesIO(r.content)
-        myrange = r.headers['content-range'].split('/')
-        totalbytes = myrange[1]
+        totalbytes = req.totalbytes
     else:
         req = open(infile, 'rb')
         totalbytes = None
@@ -214,28 +271,24 @@ def readHeader(infile, is_synapse):
     if magic_string != b"HIC":
         print('This does not appear to be a HiC file magic string is incorrect')
         return -1
-    version = struct.unpack('<i', req.read(4))[0]
+    version = _INT.unpack(req.read(4))[0]
     if version < 6:
         print("Version {0} no longer supported".format(str(version)))
         return -1
     #print('HiC version:' + '  {0}'.format(str(version)))
-    master = struct.unpack('<q', req.read(8))[0]
-    genome = b""
-    c = req.read(1)
-    while c != b'\0':
-        genome += c
-        c = req.read(1)
+    master = _LONG.unpack(req.read(8))[0]
+    genome = __readcstr(req)
 
     # read and throw away attribute dictionary (stats+graphs)
-    nattributes = struct.unpack('<i', req.read(4))[0]
+    nattributes = _INT.unpack(req.read(4))[0]
     for x in range(nattributes):
         key = __readcstr(req)
         value = __readcstr(req)
-    nChrs = struct.unpack('<i', req.read(4))[0]
+    nChrs = _INT.unpack(req.read(4))[0]
     chromDotSizes = {}
     for i in range(0, nChrs):
         name = __readcstr(req)
-        length = struct.unpack('<i', req.read(4))[0]
+        length = _INT.unpack(req.read(4))[0]
         chromDotSizes[name] = (i, length)
     return master, version, totalbytes, ChromDotSizes(chromDotSizes)
 
@@ -258,67 +311,59 @@ def readFooter(infile, is_synapse, master, totalbytes):
     """
     if infile.startswith("http"):
         headers = getHttpHeader('bytes={0}-{1}'.format(master, totalbytes), is_synapse)
-        s = requests.Session()
-        r = s.get(infile, headers=headers)
+        r = getSession().get(infile, headers=headers)
         req = io.BytesIO(r.content)
     else:
         req = open(infile, 'rb')
         req.seek(master)
 
     filePositions = dict()
-    nBytes = struct.unpack('<i', req.read(4))[0]
-    nEntries = struct.unpack('<i', req.read(4))[0]
+    nBytes = _INT.unpack(req.read(4))[0]
+    nEntries = _INT.unpack(req.read(4))[0]
 
     for i in range(nEntries):
         key = __readcstr(req)
-        fpos = struct.unpack('<q', req.read(8))[0]
-        sizeinbytes = struct.unpack('<i', req.read(4))[0]
-        filePositions[key] = (fpos, sizeinbytes)
+        filePositions[key] = _POS_SIZE.unpack(req.read(_POS_SIZE.size))
 
-    # later save these
-    nExpectedValues = struct.unpack('<i', req.read(4))[0]
+    # expected value vectors are not used, skip them
+    nExpectedValues = _INT.unpack(req.read(4))[0]
     for i in range(nExpectedValues):
         key = __readcstr(req)
-        binSize = struct.unpack('<i', req.read(4))[0]
-        nValues = struct.unpack('<i', req.read(4))[0]
-        for j in range(nValues):
-            # replace with vector.append
-            v = struct.unpack('<d', req.read(8))[0]
-        nNormalizationFactors = struct.unpack('<i', req.read(4))[0]
-        for j in range(nNormalizationFactors):
-            # replace with vector.append
-            chrIdx = struct.unpack('<i', req.read(4))[0]
-            v = struct.unpack('<d', req.read(8))[0]
-    nExpectedValues = struct.unpack('<i', req.read(4))[0]
+        binSize = _INT.unpack(req.read(4))[0]
+        nValues = _INT.unpack(req.read(4))[0]
+        # skip the values(double)
+        req.seek(nValues * 8, io.SEEK_CUR)
+        nNormalizationFactors = _INT.unpack(req.read(4))[0]
+        # skip the factors(int chrIdx + double value)
+        req.seek(nNormalizationFactors * 12, io.SEEK_CUR)
+    nExpectedValues = _INT.unpack(req.read(4))[0]
     for i in range(nExpectedValues):
         str_ = __readcstr(req)
         str_ = __readcstr(req)
-        binSize = struct.unpack('<i', req.read(4))[0]
-        nValues = struct.unpack('<i', req.read(4))[0]
-        for j in range(nValues):
-            v = struct.unpack('<d', req.read(8))[0]
-        nNormalizationFactors = struct.unpack('<i', req.read(4))[0]
-        for j in range(nNormalizationFactors):
-            chrIdx = struct.unpack('<i', req.read(4))[0]
-            v = struct.unpack('<d', req.read(8))[0]
+        binSize = _INT.unpack(req.read(4))[0]
+        nValues = _INT.unpack(req.read(4))[0]
+        # skip the values(double)
+        req.seek(nValues * 8, io.SEEK_CUR)
+        nNormalizationFactors = _INT.unpack(req.read(4))[0]
+        # skip the factors(int chrIdx + double value)
+        req.seek(nNormalizationFactors * 12, io.SEEK_CUR)
 
     normMap = dict()
-    nEntries = struct.unpack('<i', req.read(4))[0]
+    nEntries = _INT.unpack(req.read(4))[0]
     for i in range(nEntries):
         normtype = __readcstr(req)
         if normtype not in normMap:
             normMap[normtype] = {}
-        chrIdx = struct.unpack('<i', req.read(4))[0]
+        chrIdx = _INT.unpack(req.read(4))[0]
         if chrIdx not in normMap[normtype]:
             normMap[normtype][chrIdx] = {}
         unit = __readcstr(req)
         if unit not in normMap[normtype][chrIdx]:
             normMap[normtype][chrIdx][unit] = {}
-        resolution = struct.unpack('<i', req.read(4))[0]
+        resolution = _INT.unpack(req.read(4))[0]
         if resolution not in normMap[normtype][chrIdx][unit]:
             normMap[normtype][chrIdx][unit][resolution] = {}
-        filePosition = struct.unpack('<q', req.read(8))[0]
-        sizeInBytes = struct.unpack('<i', req.read(4))[0]
+        filePosition, sizeInBytes = _POS_SIZE.unpack(req.read(_POS_SIZE.size))
 
         normMap[normtype][chrIdx][unit][resolution]['position'] = filePosition
         normMap[normtype][chrIdx][unit][resolution]['size'] = sizeInBytes
@@ -341,14 +386,7 @@ def readMatrixZoomData(req, myunit, mybinsize, blockMap):
        and if so, the counts for the bins and columns
     """
     unit = __readcstr(req)
-    temp = struct.unpack('<i', req.read(4))[0]
-    temp = struct.unpack('<f', req.read(4))[0]
-    temp = struct.unpack('<f', req.read(4))[0]
-    temp = struct.unpack('<f', req.read(4))[0]
-    temp = struct.unpack('<f', req.read(4))[0]
-    binSize = struct.unpack('<i', req.read(4))[0]
-    blockBinCount = struct.unpack('<i', req.read(4))[0]
-    blockColumnCount = struct.unpack('<i', req.read(4))[0]
+    _, _, _, _, _, binSize, blockBinCount, blockColumnCount = _ZOOM_HEAD.unpack(req.read(_ZOOM_HEAD.size))
     storeBlockData = False
     # for the initial
     myBlockBinCount = -1
@@ -357,16 +395,17 @@ def readMatrixZoomData(req, myunit, mybinsize, blockMap):
         myBlockBinCount = blockBinCount
         myBlockColumnCount = blockColumnCount
         storeBlockData = True
-    nBlocks = struct.unpack('<i', req.read(4))[0]
-    for b in range(nBlocks):
-        blockNumber = struct.unpack('<i', req.read(4))[0]
-        filePosition = struct.unpack('<q', req.read(8))[0]
-        blockSizeInBytes = struct.unpack('<i', req.read(4))[0]
-        entry = dict()
-        entry['size'] = blockSizeInBytes
-        entry['position'] = filePosition
-        if storeBlockData:
-            blockMap[blockNumber] = entry
+    nBlocks = _INT.unpack(req.read(4))[0]
+    if storeBlockData:
+        entries = req.read(nBlocks * _BLOCK_ENTRY.size)
+        for blockNumber, filePosition, blockSizeInBytes in _BLOCK_ENTRY.iter_unpack(entries):
+            blockMap[blockNumber] = {'size': blockSizeInBytes, 'position': filePosition}
+    elif req.seekable():
+        # skip the block index of other zoom levels
+        req.seek(nBlocks * _BLOCK_ENTRY.size, io.SEEK_CUR)
+    else:
+        # streamed http response can't seek
+        req.read(nBlocks * _BLOCK_ENTRY.size)
     return storeBlockData, myBlockBinCount, myBlockColumnCount
 
 
@@ -387,9 +426,9 @@ def readMatrix(req, unit, binsize, blockMap):
     Raises:
        ValueError if the .hic file can't be parsed with the specified resolution (binsize)
     """
-    c1 = struct.unpack('<i', req.read(4))[0]
-    c2 = struct.unpack('<i', req.read(4))[0]
-    nRes = struct.unpack('<i', req.read(4))[0]
+    c1 = _INT.unpack(req.read(4))[0]
+    c2 = _INT.unpack(req.read(4))[0]
+    nRes = _INT.unpack(req.read(4))[0]
     i = 0
     found = False
     blockBinCount = -1
@@ -414,25 +453,57 @@ def getBlockNumbersForRegionFromBinPosition(regionIndices, blockBinCount, blockC
        intra: Flag indicating if this is an intrachromosomal matrix
 
     Returns:
-       blockSet (set): A set of blocks to print
+       blocks (list): Sorted block numbers to print
     """
     col1 = int(regionIndices[0] / blockBinCount)
     col2 = int((regionIndices[1] + 1) / blockBinCount)
     row1 = int(regionIndices[2] / blockBinCount)
     row2 = int((regionIndices[3] + 1) / blockBinCount)
-    blocksSet = set()
 
-    for r in range(row1, row2 + 1):
-        for c in range(col1, col2 + 1):
-            blockNumber = r * blockColumnCount + c
-            blocksSet.add(blockNumber)
+    rows, cols = np.mgrid[row1:row2 + 1, col1:col2 + 1]
+    blockNumbers = [(rows * blockColumnCount + cols).ravel()]
     # in Java code, this is "if getBelowDiagonal"
     if intra and col2 > row1:
-        for r in range(col1, col2 + 1):
-            for c in range(row1, row2 + 1):
-                blockNumber = r * blockColumnCount + c
-                blocksSet.add(blockNumber)
-    return blocksSet
+        rows, cols = np.mgrid[col1:col2 + 1, row1:row2 + 1]
+        blockNumbers.append((rows * blockColumnCount + cols).ravel())
+    return np.unique(np.concatenate(blockNumbers)).tolist()
+
+
+_RECORD_DTYPE = np.dtype([('binX', '<i4'), ('binY', '<i4'), ('counts', '<f4')])
+
+
+def emptyRecords():
+    """ Records of no contact. """
+    return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+
+def recordsNbytes(records):
+    return sum(arr.nbytes for arr in records)
+
+
+def concatRecords(records):
+    """ Concatenate a list of (binX, binY, counts) records into one. """
+    if not records:
+        return emptyRecords()
+    return tuple(np.concatenate(arrs) for arrs in zip(*records))
+
+
+def decompressBlock(compressedBytes):
+    """ Decompress a zlib compressed block, with libdeflate if it's installed. """
+    if deflate is None:
+        return zlib.decompress(compressedBytes)
+    # uncompressed size is not stored in the block,
+    # start from the largest one seen by this thread and double it on overflow.
+    outSize = max(getattr(_local, 'inflateSize', 0), 4 * len(compressedBytes), 1024)
+    while outSize <= _MAX_INFLATE_SIZE:
+        try:
+            uncompressedBytes = deflate.zlib_decompress(compressedBytes, outSize)
+        except deflate.DeflateError:
+            outSize *= 2
+            continue
+        _local.inflateSize = max(outSize, len(uncompressedBytes))
+        return uncompressedBytes
+    return zlib.decompress(compressedBytes)
 
 
 def readBlock(req, size, version):
@@ -445,145 +516,183 @@ def readBlock(req, size, version):
        size (int): How many bytes to read
 
     Returns:
-       array containing row, column, count data for this block
+       (binX, binY, counts) arrays(int32, int32, float32) containing row, column, count data for this block
     """
-    compressedBytes = req.read(size)
-    uncompressedBytes = zlib.decompress(compressedBytes)
-    nRecords = struct.unpack('<i', uncompressedBytes[0:4])[0]
-    v = []
+    return decodeBlock(req.read(size), version)
+
+
+def decodeBlock(compressedBytes, version):
+    """ Decompress and decode the records of a block. """
+    uncompressedBytes = decompressBlock(compressedBytes)
+    nRecords = _INT.unpack_from(uncompressedBytes, 0)[0]
     if version < 7:
-        for i in range(nRecords):
-            binX = struct.unpack('<i', uncompressedBytes[(12 * i + 4):(12 * i + 8)])[0]
-            binY = struct.unpack('<i', uncompressedBytes[(12 * i + 8):(12 * i + 12)])[0]
-            counts = struct.unpack('<f', uncompressedBytes[(12 * i + 12):(12 * i + 16)])[0]
-            record = dict()
-            record['binX'] = binX
-            record['binY'] = binY
-            record['counts'] = counts
-            v.append(record)
-    else:
-        binXOffset = struct.unpack('<i', uncompressedBytes[4:8])[0]
-        binYOffset = struct.unpack('<i', uncompressedBytes[8:12])[0]
-        useShort = struct.unpack('<b', uncompressedBytes[12:13])[0]
-        type_ = struct.unpack('<b', uncompressedBytes[13:14])[0]
-        index = 0
-        if type_ == 1:
-            rowCount = struct.unpack('<h', uncompressedBytes[14:16])[0]
-            temp = 16
-            for i in range(rowCount):
-                y = struct.unpack('<h', uncompressedBytes[temp:(temp + 2)])[0]
-                temp = temp + 2
-                binY = y + binYOffset
-                colCount = struct.unpack('<h', uncompressedBytes[temp:(temp + 2)])[0]
-                temp = temp + 2
-                for j in range(colCount):
-                    x = struct.unpack('<h', uncompressedBytes[temp:(temp + 2)])[0]
-                    temp = temp + 2
-                    binX = binXOffset + x
-                    if useShort == 0:
-                        c = struct.unpack('<h', uncompressedBytes[temp:(temp + 2)])[0]
-                        temp = temp + 2
-                        counts = c
-                    else:
-                        counts = struct.unpack('<f', uncompressedBytes[temp:(temp + 4)])[0]
-                        temp = temp + 4
-                    record = dict()
-                    record['binX'] = binX
-                    record['binY'] = binY
-                    record['counts'] = counts
-                    v.append(record)
-                    index = index + 1
-        elif type_ == 2:
-            temp = 14
-            nPts = struct.unpack('<i', uncompressedBytes[temp:(temp + 4)])[0]
+        v = np.frombuffer(uncompressedBytes, dtype=_RECORD_DTYPE, count=nRecords, offset=4)
+        return tuple(np.ascontiguousarray(v[f]) for f in _RECORD_DTYPE.names)
+
+    _, binXOffset, binYOffset, useShort, type_ = _BLOCK_HEAD.unpack_from(uncompressedBytes, 0)
+    if type_ == 1:
+        # rows of (x, counts) pairs
+        entry = np.dtype([('x', '<i2'), ('c', '<i2' if useShort == 0 else '<f4')])
+        rowCount = _SHORT.unpack_from(uncompressedBytes, 14)[0]
+        temp = 16
+        xs, ys, cs = [], [], []
+        for i in range(rowCount):
+            y, colCount = _ROW_HEAD.unpack_from(uncompressedBytes, temp)
             temp = temp + 4
-            w = struct.unpack('<h', uncompressedBytes[temp:(temp + 2)])[0]
-            temp = temp + 2
-            for i in range(nPts):
-                row = int(i / w)
-                col = i - row * w
-                bin1 = int(binXOffset + col)
-                bin2 = int(binYOffset + row)
-                if useShort == 0:
-                    c = struct.unpack('<h', uncompressedBytes[temp:(temp + 2)])[0]
-                    temp = temp + 2
-                    if c != -32768:
-                        record = dict()
-                        record['binX'] = bin1
-                        record['binY'] = bin2
-                        record['counts'] = c
-                        v.append(record)
-                        index = index + 1
-                else:
-                    counts = struct.unpack('<f', uncompressedBytes[temp:(temp + 4)])[0]
-                    temp = temp + 4
-                    if counts != 0x7fc00000:
-                        record = dict()
-                        record['binX'] = bin1
-                        record['binY'] = bin2
-                        record['counts'] = counts
-                        v.append(record)
-                        index = index + 1
-    return v
+            cols = np.frombuffer(uncompressedBytes, dtype=entry, count=colCount, offset=temp)
+            temp = temp + colCount * entry.itemsize
+            xs.append(cols['x'])
+            ys.append(np.full(colCount, y, dtype=np.int32))
+            cs.append(cols['c'])
+        if not xs:
+            return emptyRecords()
+        binX = np.concatenate(xs).astype(np.int32) + binXOffset
+        binY = np.concatenate(ys) + binYOffset
+        counts = np.concatenate(cs).astype(np.float32)
+        return binX, binY, counts
+    elif type_ == 2:
+        # dense w x (nPts / w) tile
+        nPts, w = _DENSE_HEAD.unpack_from(uncompressedBytes, 14)
+        temp = 14 + _DENSE_HEAD.size
+        if useShort == 0:
+            counts = np.frombuffer(uncompressedBytes, dtype='<i2', count=nPts, offset=temp)
+            mask = counts != -32768
+        else:
+            counts = np.frombuffer(uncompressedBytes, dtype='<f4', count=nPts, offset=temp)
+            # empty cells are NaN(0x7fc00000), check the bits
+            mask = counts.view('<u4') != 0x7fc00000
+        # only compute the positions of non-empty cells
+        idx = np.flatnonzero(mask).astype(np.int32)
+        row = idx // w
+        col = idx - row * w
+        return col + binXOffset, row + binYOffset, counts[idx].astype(np.float32)
+    return emptyRecords()
+
+
+_local = threading.local()
+
+
+def mapFile(infile):
+    """ Read-only memory map of the whole local file. """
+    with open(infile, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def readBlockBytes(infile, is_synapse, blockNum, blockMap, mm=None):
+    """ Read the compressed bytes of a block, from the memory map `mm` of the local file if it's given.
+
+    Returns:
+       list of (blockNum, compressedBytes), empty if the block has no data.
+    """
+    idx = blockMap.get(blockNum)
+    if idx is None or idx['size'] == 0:
+        return []
+    if mm is not None:
+        data = mm[idx['position']:idx['position'] + idx['size']]
+    elif infile.startswith("http"):
+        headers = getHttpHeader('bytes={0}-{1}'.format(idx['position'], idx['position'] + idx['size']), is_synapse)
+        data = getSession().get(infile, headers=headers).content[:idx['size']]
+    else:
+        with open(infile, 'rb') as req:
+            req.seek(idx['position'])
+            data = req.read(idx['size'])
+    return [(blockNum, data)]
+
+
+def readHttpBlockSpanBytes(infile, is_synapse, span):
+    """ Read the compressed bytes of a span of blocks with a single http range request.
+
+    Args:
+       span (tuple): (start, end, blocks) the byte range(end is inclusive) covering the blocks,
+                     and the list of (position, size, blockNum) of blocks within it.
+
+    Returns:
+       list of (blockNum, compressedBytes)
+    """
+    start, end, blocks = span
+    headers = getHttpHeader('bytes={0}-{1}'.format(start, end), is_synapse)
+    content = getSession().get(infile, headers=headers).content
+    return [(bNum, content[pos - start:pos - start + size]) for pos, size, bNum in blocks]
+
+
+def loadBlock(infile, is_synapse, blockNum, blockMap, version):
+    """ Read and decode the records of a block, without filtering. """
+    for _, data in readBlockBytes(infile, is_synapse, blockNum, blockMap):
+        return decodeBlock(data, version)
+    return emptyRecords()
 
 
 def readBlockWorker(infile, is_synapse, blockNum, binsize, blockMap, norm, c1Norm, c2Norm, binPositionBox, isIntra,
                     version):
-    yActual = []
-    xActual = []
-    counts = []
-    idx = dict()
-    if blockNum in blockMap:
-        idx = blockMap[blockNum]
-    else:
-        idx['size'] = 0
-        idx['position'] = 0
+    records = loadBlock(infile, is_synapse, blockNum, blockMap, version)
+    return filterRecords(records, norm, c1Norm, c2Norm, binPositionBox, isIntra)
+
+
+class BlockCache:
+    """ Thread safe LRU cache of decoded blocks, bounded by the total bytes of cached records. """
+
+    def __init__(self, max_bytes=_BLOCK_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._blocks = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, blockNum):
+        with self._lock:
+            records = self._blocks.get(blockNum)
+            if records is not None:
+                self._blocks.move_to_end(blockNum)
+            return records
+
+    def put(self, blockNum, records):
+        nbytes = recordsNbytes(records)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._blocks.pop(blockNum, None)
+            if old is not None:
+                self.nbytes -= recordsNbytes(old)
+            self._blocks[blockNum] = records
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._blocks.popitem(last=False)
+                self.nbytes -= recordsNbytes(evicted)
+
+
+def mergeBlockRanges(blocks, maxGap=_MAX_RANGE_GAP):
+    """ Merge the byte ranges of blocks, which are adjacent or close(gap <= maxGap) to each other.
 
-    if idx['size'] == 0:
-        records = []
-    else:
-        if infile.startswith("http"):
-            headers = getHttpHeader('bytes={0}-{1}'.format(idx['position'], idx['position'] + idx['size']), is_synapse)
-            s = requests.Session()
-            r = s.get(infile, headers=headers);
-            req = io.BytesIO(r.content)
+    Args:
+       blocks (list): list of (position, size, blockNum) of the blocks
+
+    Returns:
+       list of (start, end, blocks) spans, end is inclusive.
+    """
+    spans = []
+    for block in sorted(blocks):
+        pos, size = block[0], block[1]
+        if spans and pos - spans[-1][1] <= maxGap:
+            spans[-1][1] = max(spans[-1][1], pos + size)
+            spans[-1][2].append(block)
         else:
-            req = open(infile, 'rb')
-            req.seek(idx['position'])
-        records = readBlock(req, idx['size'], version)
+            spans.append([pos, pos + size, [block]])
+    return [(start, end - 1, bs) for start, end, bs in spans]
+
 
+def filterRecords(records, norm, c1Norm, c2Norm, binPositionBox, isIntra):
+    """ Select the records within the bin position box, and normalize the counts.
+    """
+    binX, binY, counts = records
     # No caching currently; in Java code we keep all records and check positions later
+    x1, x2, y1, y2 = binPositionBox
+    mask = (x1 <= binX) & (binX <= x2) & (y1 <= binY) & (binY <= y2)
+    if isIntra:
+        mask |= (x1 <= binY) & (binY <= x2) & (y1 <= binX) & (binX <= y2)
+    binX, binY, counts = binX[mask], binY[mask], counts[mask]
     if norm != "NONE":
-        for record in records:
-            binX = record['binX']
-            binY = record['binY']
-
-            if ((binPositionBox[0] <= binX <= binPositionBox[1] and binPositionBox[2] <= binY <=
-                 binPositionBox[3]) or (
-                    isIntra and binPositionBox[0] <= binY <= binPositionBox[1] and binPositionBox[2] <= binX <=
-                    binPositionBox[3])):
-                c = record['counts']
-                a = c1Norm[binX] * c2Norm[binY]
-                if a != 0.0:
-                    c = (c / a)
-                else:
-                    c = "inf"
-                xActual.append(binX)
-                yActual.append(binY)
-                counts.append(c)
-    else:
-        for record in records:
-            binX = record['binX']
-            binY = record['binY']
-            if ((binPositionBox[0] <= binX <= binPositionBox[1] and binPositionBox[2] <= binY <=
-                 binPositionBox[3]) or (
-                    isIntra and binPositionBox[0] <= binY <= binPositionBox[1] and binPositionBox[2] <= binX <=
-                    binPositionBox[3])):
-                c = record['counts']
-                xActual.append(binX)
-                yActual.append(binY)
-                counts.append(c)
-    return xActual, yActual, counts
+        a = c1Norm[binX] * c2Norm[binY]
+        counts = np.divide(counts, a, out=np.full(a.shape, np.inf), where=(a != 0.0))
+    return binX, binY, counts
 
 
 def readNormalizationVector(req):
@@ -595,15 +704,32 @@ def readNormalizationVector(req):
        position
 
     Returns:
-      Array of normalization values
+      read-only numpy array(float64) of normalization values
 
     """
-    value = []
-    nValues = struct.unpack('<i', req.read(4))[0]
-    for i in range(nValues):
-        d = struct.unpack('<d', req.read(8))[0]
-        value.append(d)
-    return value
+    nValues = _INT.unpack(req.read(4))[0]
+    # read-only view of the bytes, it's shared by reference between matrices and threads
+    return np.frombuffer(req.read(nValues * 8), dtype='<f8')
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def getSession():
+    """ Get the requests.Session shared by all http reads, keep-alive connections are reused.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
 
 
 def getHttpHeader(endrange, is_synapse):
@@ -612,17 +738,95 @@ def getHttpHeader(endrange, is_synapse):
     return {'range': endrange, 'x-amz-meta-requester': 'straw'}
 
 
+class BufferedRangeReader:
+    """ Read-only file-like object of a remote file, fetching http ranges on demand.
+
+    Fetched bytes are kept from the start of the file, so it's for the small leading part(header)
+    of the file. The status code of the first request is in `status_code`, size of the whole
+    file(from the Content-Range) is in `totalbytes`.
+    """
+
+    def __init__(self, url, is_synapse=False, chunk=_RANGE_CHUNK):
+        self.url = url
+        self.is_synapse = is_synapse
+        self.chunk = chunk
+        self.buffer = bytearray()
+        self.pos = 0
+        self.totalbytes = None
+        self.status_code = None
+        self._eof = False
+        self._fill(chunk)
+
+    def _fill(self, end):
+        """ Fetch ranges until the buffer covers bytes [0, end) or reaches the end of file. """
+        while len(self.buffer) < end and not self._eof:
+            start = len(self.buffer)
+            if self.totalbytes is not None and start >= self.totalbytes:
+                self._eof = True
+                break
+            stop = start + max(self.chunk, end - start)
+            headers = getHttpHeader('bytes={0}-{1}'.format(start, stop - 1), self.is_synapse)
+            r = getSession().get(self.url, headers=headers)
+            if self.status_code is None:
+                self.status_code = r.status_code
+            if r.status_code >= 400:
+                self._eof = True
+                break
+            if r.status_code == 200:
+                # range is not supported, got the whole file
+                self.buffer = bytearray(r.content)
+                self.totalbytes = len(self.buffer)
+                self._eof = True
+                break
+            contentRange = r.headers.get('content-range', '')
+            if '/' in contentRange and contentRange.split('/')[1] != '*':
+                self.totalbytes = int(contentRange.split('/')[1])
+            self.buffer += r.content
+            if len(r.content) < stop - start:
+                self._eof = True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            self._fill(float('inf'))
+            size = len(self.buffer) - self.pos
+        self._fill(self.pos + size)
+        data = bytes(self.buffer[self.pos:self.pos + size])
+        self.pos += len(data)
+        return data
+
+    def peek(self, size=1):
+        self._fill(self.pos + max(size, 1))
+        return bytes(self.buffer[self.pos:self.pos + max(size, 1)])
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            self._fill(float('inf'))
+            offset += len(self.buffer)
+        self.pos = offset
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        self.buffer = bytearray()
+
+
 def readLocalNorm(infile, position):
-    req = open(infile, 'rb')
-    req.seek(position)
-    return readNormalizationVector(req)
+    with open(infile, 'rb') as req:
+        req.seek(position)
+        return readNormalizationVector(req)
 
 
 def readHttpNorm(infile, normEntry, is_synapse):
     endrange = 'bytes={0}-{1}'.format(normEntry['position'], normEntry['position'] + normEntry['size'])
     headers = getHttpHeader(endrange, is_synapse)
-    s = requests.Session()
-    r = s.get(infile, headers=headers);
+    r = getSession().get(infile, headers=headers)
     req = io.BytesIO(r.content);
     return readNormalizationVector(req)
 
@@ -647,8 +851,64 @@ class straw:
         self.is_synapse = is_synapse
         self.master, self.version, totalbytes, self.chromDotSizes = readHeader(infile, is_synapse)
         self.myFilePositions, self.normMap = readFooter(infile, is_synapse, self.master, totalbytes)
+        # map the local file once, blocks are sliced from it.
+        # the map is shared with the matrices, and unmapped when none of them refers to it.
+        # (chrIndex1, chrIndex2, unit, binsize) -> (blockBinCount, blockColumnCount, blockMap)
+        self._matrixCache = {}
+        # (norm, chrIndex, unit, binsize) -> future of the normalization vector
+        self._normCache = {}
+        self.mm = None
+        if not self.isHttpFile:
+            self.mm = mapFile(infile)
+        self._executor = None
+        self._closed = False
+
+    @property
+    def executor(self):
+        # pool reading the matrix indexes and normalization vectors
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor()
+        return self._executor
+
+    def close(self):
+        """ Unmap the local file and shut down the pool.
+        The matrices got from this object can't read the local file after closing.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _normVector(self, executor, key, normEntry):
+        """ Future of the normalization vector, vectors are read once and shared by all matrices. """
+        future = self._normCache.get(key)
+        if future is None:
+            if self.isHttpFile:
+                future = executor.submit(readHttpNorm, self.infile, normEntry, self.is_synapse)
+            else:
+                future = executor.submit(readLocalNorm, self.infile, normEntry['position'])
+            self._normCache[key] = future
+
+            def dropFailed(f):
+                # don't keep the failed read
+                if f.exception() is not None:
+                    self._normCache.pop(key, None)
+
+            future.add_done_callback(dropFailed)
+        return future
 
     def getNormalizedMatrix(self, chr1, chr2, norm, unit, binsize):
+        if self._closed:
+            raise ValueError("I/O operation on closed straw object of {}".format(self.infile))
 
         if not (unit == "BP" or unit == "FRAG"):
             print(
@@ -670,7 +930,7 @@ class straw:
             chrIndex1, chrIndex2 = chrIndex2, chrIndex1
             chr1, chr2 = chr2, chr1
 
-        executor = concurrent.futures.ThreadPoolExecutor()
+        executor = self.executor
         if norm != "NONE":
             try:
                 c1NormEntry = self.normMap[norm][chrIndex1][unit][binsize]
@@ -686,30 +946,30 @@ class straw:
                     print("File did not contain {0} norm vectors for chr {1} at {2} {3}\n".format(norm, chr2, binsize,
                                                                                                   unit))
                     return None
-            if self.isHttpFile:
-                futureNorm1 = executor.submit(readHttpNorm, self.infile, c1NormEntry, self.is_synapse)
-                if not isIntra:
-                    futureNorm2 = executor.submit(readHttpNorm, self.infile, c2NormEntry, self.is_synapse)
-            else:
-                futureNorm1 = executor.submit(readLocalNorm, self.infile, c1NormEntry['position'])
-                if not isIntra:
-                    futureNorm2 = executor.submit(readLocalNorm, self.infile, c2NormEntry['position'])
+            futureNorm1 = self._normVector(executor, (norm, chrIndex1, unit, binsize), c1NormEntry)
+            if not isIntra:
+                futureNorm2 = self._normVector(executor, (norm, chrIndex2, unit, binsize), c2NormEntry)
 
-        blockMap = dict()
         key = str(chrIndex1) + "_" + str(chrIndex2)
         if key not in self.myFilePositions:
             print("File doesn't have the given {0} map\n".format(key))
             return None
-        myFilePos = self.myFilePositions[key][0]
-        if self.isHttpFile:
-            headers = getHttpHeader('bytes={0}-'.format(myFilePos), self.is_synapse)
-            s = requests.Session()
-            r = s.get(self.infile, headers=headers, stream=True)
-            futureMatrix = executor.submit(readMatrix, r.raw, unit, binsize, blockMap)
-        else:
-            req = open(self.infile, 'rb')
-            req.seek(myFilePos)
-            futureMatrix = executor.submit(readMatrix, req, unit, binsize, blockMap)
+        # the block index of a matrix is read only once
+        matrixKey = (chrIndex1, chrIndex2, unit, binsize)
+        cachedMatrix = self._matrixCache.get(matrixKey)
+        if cachedMatrix is None:
+            blockMap = dict()
+            myFilePos = self.myFilePositions[key][0]
+            if self.isHttpFile:
+                headers = getHttpHeader('bytes={0}-'.format(myFilePos), self.is_synapse)
+                req = getSession().get(self.infile, headers=headers, stream=True)
+                futureMatrix = executor.submit(readMatrix, req.raw, unit, binsize, blockMap)
+            else:
+                req = open(self.infile, 'rb')
+                req.seek(myFilePos)
+                futureMatrix = executor.submit(readMatrix, req, unit, binsize, blockMap)
+            # close when done, for http this gives the connection back to the session's pool
+            futureMatrix.add_done_callback(lambda _: req.close())
 
         if norm != "NONE":
             c1Norm = futureNorm1.result()
@@ -720,14 +980,18 @@ class straw:
         else:
             c1Norm, c2Norm = None, None
 
-        blockBinCount, blockColumnCount = futureMatrix.result()
+        if cachedMatrix is None:
+            blockBinCount, blockColumnCount = futureMatrix.result()
+            self._matrixCache[matrixKey] = (blockBinCount, blockColumnCount, blockMap)
+        else:
+            blockBinCount, blockColumnCount, blockMap = cachedMatrix
         return normalizedmatrix(self.infile, self.is_synapse, binsize, isIntra, neededToFlipIndices, blockBinCount,
-                                blockColumnCount, blockMap, norm, c1Norm, c2Norm, self.version)
+                                blockColumnCount, blockMap, norm, c1Norm, c2Norm, self.version, mm=self.mm)
 
 
 class normalizedmatrix:
     def __init__(self, infile, is_synapse, binsize, isIntra, neededToFlipIndices, blockBinCount, blockColumnCount,
-                 blockMap, norm, c1Norm, c2Norm, version):
+                 blockMap, norm, c1Norm, c2Norm, version, mm=None):
         self.infile = infile
         self.is_synapse = is_synapse
         self.isHttpFile = infile.startswith("http")
@@ -741,9 +1005,56 @@ class normalizedmatrix:
         self.c2Norm = c2Norm
         self.blockMap = blockMap
         self.version = version
+        # the map of the local file is shared by the straw object, map it here when not given
+        self._ownsMap = mm is None and not self.isHttpFile
+        self.mm = mapFile(infile) if self._ownsMap else mm
+        self._executor = None
+        self._ioExecutor = None
+        self.blockCache = BlockCache()
+        self._closed = False
+
+    def close(self):
+        """ Shut down the pools, release the cached blocks and the file map(a shared map is unmapped by the straw object).
+        """
+        for executor in (self._executor, self._ioExecutor):
+            if executor is not None:
+                executor.shutdown(wait=False)
+        self._executor = self._ioExecutor = None
+        self.blockCache = BlockCache()
+        if self._ownsMap and self.mm is not None:
+            self.mm.close()
+        self.mm = None
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # idle worker threads of the pools are not kept after the matrix is gone
+        for executor in (self._executor, self._ioExecutor):
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    @property
+    def executor(self):
+        # pool decoding the blocks, inflating releases the GIL, threads are enough
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count())
+        return self._executor
+
+    @property
+    def ioExecutor(self):
+        # pool fetching the compressed bytes of blocks
+        if self._ioExecutor is None:
+            self._ioExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=min(_IO_WORKERS, os.cpu_count()))
+        return self._ioExecutor
 
     def getDataFromBinRegion(self, X1, X2, Y1, Y2):
-        binsize = self.binsize
+        if self._closed:
+            raise ValueError("I/O operation on closed normalizedmatrix of {}".format(self.infile))
         if self.neededToFlipIndices:
             X1, X2, Y1, Y2 = Y1, Y2, X1, X2
         binPositionsBox = []
@@ -754,21 +1065,41 @@ class normalizedmatrix:
 
         blockNumbers = getBlockNumbersForRegionFromBinPosition(binPositionsBox, self.blockBinCount,
                                                                self.blockColumnCount, self.isIntra)
-        yActual = []
-        xActual = []
-        counts = []
-
-        executor = concurrent.futures.ProcessPoolExecutor()
-        futures = [
-            executor.submit(readBlockWorker, self.infile, self.is_synapse, bNum, binsize, self.blockMap, self.norm, \
-                            self.c1Norm, self.c2Norm, binPositionsBox, self.isIntra, self.version) for bNum in
-            blockNumbers]
-
-        for future in futures:
-            xTemp, yTemp, cTemp = future.result()
-            xActual.extend(xTemp)
-            yActual.extend(yTemp)
-            counts.extend(cTemp)
+        # decoded blocks are cached, only the missing ones are read
+        records = []
+        missing = []
+        for bNum in blockNumbers:
+            cached = self.blockCache.get(bNum)
+            if cached is not None:
+                records.append(cached)
+            elif bNum in self.blockMap and self.blockMap[bNum]['size'] > 0:
+                missing.append(bNum)
+
+        # pipeline: blocks are fetched in the io pool, and decoded in the
+        # decode pool as soon as their bytes arrive.
+        if self.isHttpFile:
+            # coalesce the blocks close to each other to one range request
+            blocks = [(self.blockMap[b]['position'], self.blockMap[b]['size'], b) for b in missing]
+            fetches = [self.ioExecutor.submit(readHttpBlockSpanBytes, self.infile, self.is_synapse, span)
+                       for span in mergeBlockRanges(blocks)]
+        else:
+            fetches = [self.ioExecutor.submit(readBlockBytes, self.infile, self.is_synapse, bNum, self.blockMap,
+                                              self.mm)
+                       for bNum in missing]
+        decodes = [
+            (bNum, self.executor.submit(decodeBlock, data, self.version))
+            for fetch in concurrent.futures.as_completed(fetches)
+            for bNum, data in fetch.result()
+        ]
+
+        for bNum, decode in decodes:
+            blockRecords = decode.result()
+            self.blockCache.put(bNum, blockRecords)
+            records.append(blockRecords)
+
+        allRecords = concatRecords(records)
+        xActual, yActual, counts = filterRecords(allRecords, self.norm, self.c1Norm, self.c2Norm,
+                                                 binPositionsBox, self.isIntra)
         return [xActual, yActual, counts]
 
     def getDataFromGenomeRegion(self, X1, X2, Y1, Y2):
@@ -776,11 +1107,11 @@ class normalizedmatrix:
         return self.getDataFromBinRegion(X1 / binsize, math.ceil(X2 / binsize), Y1 / binsize, math.ceil(Y2 / binsize))
 
     def getBatchedDataFromGenomeRegion(self, listOfCoordinates):
-        executor = concurrent.futures.ThreadPoolExecutor()
-        futures = [executor.submit(self.getDataFromGenomeRegion, a, b, c, d) for (a, b, c, d) in listOfCoordinates]
-        finalResults = list()
-        for future in futures:
-            finalResults.append(future.result())
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            futures = [executor.submit(self.getDataFromGenomeRegion, a, b, c, d) for (a, b, c, d) in listOfCoordinates]
+            finalResults = list()
+            for future in futures:
+                finalResults.append(future.result())
         return finalResults
 
 
@@ -798,14 +1129,12 @@ def printme(norm, infile, chr1loc, chr2loc, unit, binsize, outfile):
        outfile(str): Name of text file to write to
     """
     f = open(outfile, 'w')
-    strawObj = straw(infile)
-
-    chr1, X1, X2 = strawObj.chromDotSizes.figureOutEndpoints(chr1loc)
-    chr2, Y1, Y2 = strawObj.chromDotSizes.figureOutEndpoints(chr2loc)
-
-    matrxObj = strawObj.getNormalizedMatrix(chr1, chr2, norm, unit, binsize)
+    with straw(infile) as strawObj:
+        chr1, X1, X2 = strawObj.chromDotSizes.figureOutEndpoints(chr1loc)
+        chr2, Y1, Y2 = strawObj.chromDotSizes.figureOutEndpoints(chr2loc)
 
-    result = matrxObj.getDataFromGenomeRegion(X1, X2, Y1, Y2)
+        with strawObj.getNormalizedMatrix(chr1, chr2, norm, unit, binsize) as matrxObj:
+            result = matrxObj.getDataFromGenomeRegion(X1, X2, Y1, Y2)
 
     for i in range(len(result[0])):
         f.write("{0}\t{1}\t{2}\n".format(result[0][i], result[1][i], result[2][i]))
@@ -1,29 +1,44 @@
+import os.path as osp
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Iterable
+
 from ..genome import GenomeRange
 
+# uri of a group in the cooler file, e.g. "a.mcool::/resolutions/5000"
+_COOLER_URI_RE = re.compile(r".+::.+$")
+
+# h5py open options for cooler files: a larger raw chunk cache (the default is 1MiB)
+# so that the compressed pixel chunks are decoded once per open.
+H5_OPEN_KWARGS = dict(rdcc_nbytes=64 * 1024 * 1024, rdcc_nslots=10007)
+
 
 def hicmat_filetype(path):
     if path.endswith(".hic"):
         return '.hic'
-    p = path.split("::")[0]
+    p = path.partition("::")[0]
     if p.endswith((".cool", ".mcool")):
         return '.cool'
     else:
         raise NotImplementedError("File type of {} not supported for HicMat".format(path))
 
 
-def infer_resolution(genome_range: GenomeRange, resolutions: object, bin_thresh: object = 1000) -> object:
+def infer_resolution(genome_range: GenomeRange, resolutions: Iterable[int], bin_thresh: int = 1000) -> int:
     """
     Inference appropriate resolution.
+
+    The finest resolution which split the range into less than `bin_thresh` bins,
+    or the coarsest one if there is no such resolution.
     """
-    resolutions.sort()
-    reso = resolutions[0]
-    for r in resolutions:
-        num_bins = genome_range.length // reso
-        if num_bins >= bin_thresh:
-            reso = r
-        else:
-            break
-    return reso
+    res = sorted(resolutions)
+    # length // r < bin_thresh  <=>  r > length // bin_thresh
+    idx = bisect_right(res, genome_range.length // bin_thresh)
+    return res[min(idx, len(res) - 1)]
+
+
+def _mtime(cooler_file):
+    return osp.getmtime(cooler_file.partition("::")[0])
 
 
 def is_multi_cool(cooler_file):
@@ -35,15 +50,16 @@ def is_multi_cool(cooler_file):
     cooler_file : str
         Path to cooler file.
     """
-    import re
-    if re.match(".+::.+$", cooler_file):
+    if _COOLER_URI_RE.match(cooler_file):
         return False
+    return _is_multi_cool(cooler_file, _mtime(cooler_file))
 
+
+@lru_cache(maxsize=32)
+def _is_multi_cool(cooler_file, mtime):
     import h5py
-    h5_file = h5py.File(cooler_file, 'r')
-    is_multi = 'pixels' not in h5_file  # use "pixels" group distinguish is multi-cool or not
-    h5_file.close()
-    return is_multi
+    with h5py.File(cooler_file, 'r', **H5_OPEN_KWARGS) as h5_file:
+        return 'pixels' not in h5_file  # use "pixels" group distinguish is multi-cool or not
 
 
 def get_cooler_resolutions(cooler_file, is_multi=True):
@@ -55,16 +71,47 @@ def get_cooler_resolutions(cooler_file, is_multi=True):
     cooler_file : str
         Path to cooler file.
     """
-    import h5py
-    h5_file = h5py.File(cooler_file, 'r')
     if is_multi:
+        return [res for res, _ in _get_cooler_groups(cooler_file, _mtime(cooler_file))]
+    return [_get_cooler_binsize(cooler_file, _mtime(cooler_file))]
+
+
+def get_cooler_groups(cooler_file):
+    """
+    Get the group paths of resolutions in a muliti-cooler file.
+
+    Parameters
+    ----------
+    cooler_file : str
+        Path to cooler file.
+
+    Return
+    ------
+    groups : dict
+        resolution -> path of the group, e.g. {5000: '/resolutions/5000'}
+    """
+    return dict(_get_cooler_groups(cooler_file, _mtime(cooler_file)))
+
+
+@lru_cache(maxsize=32)
+def _get_cooler_groups(cooler_file, mtime):
+    import h5py
+    groups = {}
+    with h5py.File(cooler_file, 'r', **H5_OPEN_KWARGS) as h5_file:
         if 'resolutions' in h5_file:
-            resolutions = list(h5_file['resolutions'])
-            resolutions = [int(res) for res in resolutions]
+            for res in h5_file['resolutions']:
+                groups[int(res)] = '/resolutions/{}'.format(res)
         else:
-            resolutions = [int(h5_file[i].attrs['bin-size']) for i in list(h5_file)]
-        resolutions.sort()
-        h5_file.close()
-    else:
-        resolutions = [int(h5_file.attrs['bin-size'])]
-    return resolutions
+            # one pass over the top level groups, read the bin size attribute of each
+            for name, grp in h5_file.items():
+                binsize = grp.attrs.get('bin-size')
+                if binsize is not None:
+                    groups.setdefault(int(binsize), name)
+    return tuple(sorted(groups.items()))
+
+
+@lru_cache(maxsize=32)
+def _get_cooler_binsize(cooler_file, mtime):
+    import h5py
+    with h5py.File(cooler_file, 'r', **H5_OPEN_KWARGS) as h5_file:
+        return int(h5_file.attrs['bin-size'])
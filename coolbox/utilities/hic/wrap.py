@@ -1,8 +1,42 @@
+import os.path as osp
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+from pandas import DataFrame, Categorical
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+try:
+    import strawC
+except ImportError:
+    # fallback to the pure python straw, imported on first use
+    strawC = None
+
 from coolbox.utilities.logtools import get_logger
 from coolbox.utilities.genome import to_gr
+from .tools import (
+    infer_resolution, is_multi_cool, get_cooler_resolutions, get_cooler_groups, H5_OPEN_KWARGS
+)
 
 log = get_logger(__name__)
 
+_HEADER_CHUNK = 64 * 1024
+# fill the matrix with the parallel kernel when there are more contacts than this
+_PARALLEL_FILL_MIN = 100_000
+# max total bytes of the contact arrays cached between fetches of '.hic' files
+_STRAW_ARRAYS_CACHE_BYTES = 256 * 1024 * 1024
+_HIC_HEAD = struct.Struct('<3sxiq')  # magic string, version, master index
+_INT = struct.Struct('<i')
+
 
 class StrawWrap(object):
     """
@@ -32,190 +66,269 @@ class StrawWrap(object):
             normalization = 'KR'
         self.normalization = normalization
         self.binsize = binsize
-        self.chromosomes, self.resolutions, self.masterindex, self.genome, self.metadata = self.__info()
+        self.chromosomes, self.resolutions, self.masterindex, self.genome, self.metadata = \
+            _read_hic_header(osp.realpath(path), osp.getmtime(path))
+        self._chromnames = {name for _, name, _ in self.chromosomes.values()}
         self.fetched_binsize = None
 
-    def fetch(self, gr1, gr2=None):
+    def fetch(self, gr1, gr2=None, sparse=False, dtype=np.float32):
         """
+        Parameters
+        ----------
+        sparse : bool
+            Return a scipy.sparse.csr_matrix instead of a dense array,
+            avoid allocating the whole matrix for large regions.
+            default False
+
+        dtype : numpy.dtype
+            Data type of the matrix, float32 is precise enough for contacts
+            and halves the memory of float64.
+            default numpy.float32
+
         Return
         ------
-        matrix : numpy.ndarray
+        matrix : {numpy.ndarray, scipy.sparse.csr_matrix}
+            float32 by default, the matrix was float64 before the `dtype` argument,
+            pass dtype=numpy.float64 for exactly the same values as before.
         """
-        from coolbox.utilities.genome import GenomeRange
-
         flip = False
 
         if gr2 is None:
             gr2 = gr1
-        gr1 = to_gr(gr1)
-        gr2 = to_gr(gr2)
+        gr1 = self._normalize_range(gr1)
+        gr2 = self._normalize_range(gr2)
         if gr2.start < gr1.start:
             flip = True
             gr1, gr2 = gr2, gr1
 
-        if isinstance(gr1, str):
-            gr1 = GenomeRange(gr1)
-        if isinstance(gr2, str):
-            gr2 = GenomeRange(gr2)
-
-        if gr1.chrom.startswith("chr"):
-            gr1.change_chrom_names()
-        if gr2.chrom.startswith("chr"):
-            gr2.change_chrom_names()
-
         binsize = self.infer_binsize(gr1)
         self.fetched_binsize = binsize  # expose fetched binsize
 
-        straw_iter = self.__fetch_straw_iter(gr1, gr2, binsize)
-        mat = self.__straw_to_matrix(straw_iter, gr1, gr2, binsize)
+        straw_arrays = self.__fetch_straw_arrays(gr1, gr2, binsize)
+        mat = self.__straw_to_matrix(straw_arrays, gr1, gr2, binsize, sparse, dtype)
         if flip:
-            mat = mat.T
+            mat = mat.T.tocsr() if sparse else mat.T
         return mat
 
     def infer_binsize(self, genome_range):
-        from .tools import infer_resolution
         if self.binsize == 'auto':
             return infer_resolution(genome_range, self.resolutions)
         else:
             return self.binsize
 
-    def __fetch_straw_iter(self, genome_range1, genome_range2, binsize):
-        try:
-            slist = self.__fetch_straw_list_strawc(genome_range1, genome_range2, binsize)
-            siter = ((r.binX, r.binY, r.counts) for r in slist)
-        except ImportError:
-            log.warning("strawC is not installed. Install strawC to achieve faster read speed: $ pip install strawC")
-            slist = self.__fetch_straw_list_straw(genome_range1, genome_range2, binsize)
-            siter = ((r[0] * binsize, r[1] * binsize, r[2]) for r in zip(*slist))
-        return siter
-
-    def __fetch_straw_list_straw(self, genome_range1, genome_range2, binsize):
-        from coolbox.utilities.hic.straw import straw
-        s1, e1 = genome_range1.start//binsize, genome_range1.end//binsize
-        s2, e2 = genome_range2.start//binsize, genome_range2.end//binsize
-        straw_obj = straw(self.hic_file)
-        matrix_obj = straw_obj.getNormalizedMatrix(genome_range1.chrom, genome_range2.chrom, self.normalization, 'BP', binsize)
-        if matrix_obj is None:
-            log.warning("Try to read unbalanced matrix.")
-            self.normalization = "NONE"
-            matrix_obj = straw_obj.getNormalizedMatrix(genome_range1.chrom, genome_range2.chrom, self.normalization, 'BP', binsize)
-        slist = matrix_obj.getDataFromBinRegion(s1, e1, s2, e2)
-        return slist
-
-    def __fetch_straw_list_strawc(self, genome_range1, genome_range2, binsize):
-        import strawC
-        chr1loc = str(genome_range1).replace('-', ':')
-        chr2loc = str(genome_range2).replace('-', ':')
-        slist = []
-        try:
-            slist = strawC.strawC(self.normalization, self.hic_file, chr1loc, chr2loc, 'BP', binsize)
-        except Exception as e:
-            log.warning("Error occurred when reading the dothic file with straw:")
-            log.warning(str(e))
-            if self.normalization != "NONE":
-                log.warning("Try to read unbalanced matrix.")
-                self.normalization = "NONE"
-                try:
-                    slist = strawC.strawC(self.normalization, self.hic_file, chr1loc, chr2loc, 'BP', binsize)
-                except Exception as e:
-                    log.warning("Failed.")
-                    log.warning(str(e))
-                log.warning("Unbalanced matrix is readed.")
-        return slist
+    def _normalize_range(self, genome_range):
+        """Convert to GenomeRange with the chromosome name used in .hic file, e.g. 'chr1' -> '1'."""
+        genome_range = to_gr(genome_range)
+        if genome_range.chrom not in self._chromnames:
+            genome_range.change_chrom_names()
+        return genome_range
+
+    def __fetch_straw_arrays(self, genome_range1, genome_range2, binsize):
+        """Fetch contacts as (loc1, loc2, value) arrays, loc1 and loc2 are the start positions of bins."""
+        region1 = (genome_range1.chrom, genome_range1.start, genome_range1.end)
+        region2 = (genome_range2.chrom, genome_range2.start, genome_range2.end)
+        # the cache is shared between wraps, tracks create a new wrap for every fetch
+        self.normalization, arrays = _fetch_straw_arrays(
+            osp.realpath(self.hic_file), osp.getmtime(self.hic_file),
+            self.normalization, region1, region2, binsize
+        )
+        return arrays
 
     def fetch_pixels(self, genome_range1, genome_range2=None):
-        from pandas import DataFrame
         if genome_range2 is None:
             genome_range2 = genome_range1
-        if genome_range1.chrom.startswith("chr"):
-            genome_range1.change_chrom_names()
-        if genome_range2.chrom.startswith("chr"):
-            genome_range2.change_chrom_names()
+        genome_range1 = self._normalize_range(genome_range1)
+        genome_range2 = self._normalize_range(genome_range2)
         binsize = self.infer_binsize(genome_range1)
-        siter = self.__fetch_straw_iter(genome_range1, genome_range2, binsize)
-        rows = [[i[0], i[1], i[2]] for i in siter]
-        pixels = DataFrame(rows)
-        pixels.columns = ['start1', 'start2', 'value']
-        pixels['start1'] = pixels['start1'].astype('int32')
-        pixels['start2'] = pixels['start2'].astype('int32')
-        pixels['end1'] = pixels['start1'] + binsize
-        pixels['end2'] = pixels['start2'] + binsize
-        pixels['chrom1'] = genome_range1.chrom
-        pixels['chrom2'] = genome_range2.chrom
-        pixels = pixels[['chrom1', 'start1', 'end1', 'chrom2', 'start2', 'end2', 'value']]
+        loc1, loc2, vals = self.__fetch_straw_arrays(genome_range1, genome_range2, binsize)
+        start1 = loc1.astype('int32')
+        start2 = loc2.astype('int32')
+        n = len(vals)
+        # chromosome columns are categorical like cooler's pixels, not n copies of a string
+        pixels = DataFrame({
+            'chrom1': Categorical.from_codes(np.zeros(n, dtype=np.int8), [genome_range1.chrom]),
+            'start1': start1,
+            'end1': start1 + binsize,
+            'chrom2': Categorical.from_codes(np.zeros(n, dtype=np.int8), [genome_range2.chrom]),
+            'start2': start2,
+            'end2': start2 + binsize,
+            'value': vals,
+        })
         return pixels
 
-    def __straw_to_matrix(self, straw_iter, genome_range1, genome_range2, binsize):
-        import numpy as np
+    def __straw_to_matrix(self, straw_arrays, genome_range1, genome_range2, binsize, sparse=False, dtype=np.float32):
+        loc1, loc2, vals = straw_arrays
+        vals = vals.astype(dtype, copy=False)
         binlen1 = (genome_range1.length // binsize) + 1
         binlen2 = (genome_range2.length // binsize) + 1
-        mat = np.zeros((binlen1, binlen2), dtype=np.float64)
         is_cis = (genome_range1 == genome_range2)
-        for rec in straw_iter:
-            loc1, loc2, c = rec[0], rec[1], rec[2]
-            bin1id = (loc1 - genome_range1.start) // binsize
-            bin2id = (loc2 - genome_range2.start) // binsize
+        if not sparse and _fill_matrix is not None:
+            mat = np.zeros((binlen1, binlen2), dtype=dtype)
+            fill = _fill_matrix_parallel if vals.shape[0] > _PARALLEL_FILL_MIN else _fill_matrix
+            fill(mat, loc1, loc2, vals, genome_range1.start, genome_range2.start, binsize, is_cis)
+            return mat
+        bin1 = (loc1 - genome_range1.start) // binsize
+        bin2 = (loc2 - genome_range2.start) // binsize
+        inside = (bin1 >= 0) & (bin1 < binlen1) & (bin2 >= 0) & (bin2 < binlen2)
+        bin1, bin2, vals = bin1[inside], bin2[inside], vals[inside]
+        if sparse:
+            from scipy.sparse import coo_matrix, diags
+            mat = coo_matrix((vals, (bin1, bin2)), shape=(binlen1, binlen2)).tocsr()
             if is_cis:
-                mat[bin1id, bin2id] = c
-                mat[bin2id, bin1id] = c
-            else:
-                if (0 <= bin1id < mat.shape[0]) and (0 <= bin2id < mat.shape[1]):
-                    mat[bin1id, bin2id] = c
+                # mirror the upper triangle, without doubling the diagonal
+                mat = (mat + mat.T - diags(mat.diagonal())).tocsr()
+            return mat
+        mat = np.zeros((binlen1, binlen2), dtype=dtype)
+        mat[bin1, bin2] = vals
+        if is_cis:
+            mat[bin2, bin1] = vals
         return mat
 
-    def __info(self):
-        """
-        from hic2cool code:
-            https://github.com/4dn-dcic/hic2cool/blob/master/hic2cool/hic2cool_utils.py#L73
-
-        Takes in a .hic file and returns a dictionary containing information about
-        the chromosome. Keys are chromosome index numbers (0 through # of chroms
-        contained in file) and values are [chr idx (int), chr name (str), chrom
-        length (str)]. Returns the masterindex used by the file as well as the open
-        file object.
-        """
-        import sys
-        import struct
-        from .straw import readcstr
 
-        req = open(self.hic_file, 'rb')
+class _ArraysCache(object):
+    """Thread safe LRU cache of the fetched contact arrays, bounded by their total bytes."""
+
+    def __init__(self, max_bytes=_STRAW_ARRAYS_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _nbytes(item):
+        _, arrays = item
+        return sum(arr.nbytes for arr in arrays)
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key, item):
+        nbytes = self._nbytes(item)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= self._nbytes(old)
+            self._items[key] = item
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.nbytes -= self._nbytes(evicted)
+
+
+_straw_arrays_cache = _ArraysCache()
+
+
+def _fetch_straw_arrays(path, mtime, normalization, region1, region2, binsize):
+    """
+    Fetch contacts of two regions in the '.hic' file, cached by the arguments.
+
+    Return
+    ------
+    normalization : str
+        The normalization actually used, 'NONE' if the balanced matrix can not be read.
+    arrays : tuple
+        (loc1, loc2, value) read-only arrays, loc1 and loc2 are the start positions of bins.
+    """
+    key = (path, mtime, normalization, region1, region2, binsize)
+    item = _straw_arrays_cache.get(key)
+    if item is None:
+        item = _read_straw_arrays(path, mtime, normalization, region1, region2, binsize)
+        _straw_arrays_cache.put(key, item)
+    return item
+
+
+def _read_straw_arrays(path, mtime, normalization, region1, region2, binsize):
+    if strawC is not None:
+        normalization, slist = _fetch_straw_list_strawc(path, normalization, region1, region2, binsize)
+        # strawC gives contact records, fill the typed arrays without intermediate lists
+        n = len(slist)
+        loc1 = np.fromiter((r.binX for r in slist), dtype=np.int64, count=n)
+        loc2 = np.fromiter((r.binY for r in slist), dtype=np.int64, count=n)
+        vals = np.fromiter((r.counts for r in slist), dtype=np.float64, count=n)
+    else:
+        log.warning("strawC is not installed. Install strawC to achieve faster read speed: $ pip install strawC")
+        normalization, (binX, binY, counts) = _fetch_straw_list_straw(
+            path, mtime, normalization, region1, region2, binsize
+        )
+        # bin indexes are int32 arrays, widen them before scaling to positions
+        loc1 = binX.astype(np.int64) * binsize
+        loc2 = binY.astype(np.int64) * binsize
+        vals = counts.astype(np.float64)
+    for arr in (loc1, loc2, vals):
+        arr.setflags(write=False)
+    return normalization, (loc1, loc2, vals)
+
+
+@lru_cache(maxsize=8)
+def _straw_obj(path, mtime):
+    """Opened straw object of the '.hic' file, reuse its header, footer and matrix caches between fetches."""
+    from coolbox.utilities.hic.straw import straw
+    return straw(path)
+
+
+def _fetch_straw_list_straw(path, mtime, normalization, region1, region2, binsize):
+    (chrom1, start1, end1), (chrom2, start2, end2) = region1, region2
+    s1, e1 = start1//binsize, end1//binsize
+    s2, e2 = start2//binsize, end2//binsize
+    straw_obj = _straw_obj(path, mtime)
+    matrix_obj = straw_obj.getNormalizedMatrix(chrom1, chrom2, normalization, 'BP', binsize)
+    if matrix_obj is None:
+        log.warning("Try to read unbalanced matrix.")
+        normalization = "NONE"
+        matrix_obj = straw_obj.getNormalizedMatrix(chrom1, chrom2, normalization, 'BP', binsize)
+    with matrix_obj:
+        slist = matrix_obj.getDataFromBinRegion(s1, e1, s2, e2)
+    return normalization, slist
+
+
+def _fetch_straw_list_strawc(path, normalization, region1, region2, binsize):
+    # straw takes "chrom:start:end" locations, format them from the fields
+    (chrom1, start1, end1), (chrom2, start2, end2) = region1, region2
+    chr1loc = f"{chrom1}:{start1}:{end1}"
+    chr2loc = f"{chrom2}:{start2}:{end2}"
+    slist = []
+    try:
+        slist = strawC.strawC(normalization, path, chr1loc, chr2loc, 'BP', binsize)
+    except Exception as e:
+        log.warning("Error occurred when reading the dothic file with straw:")
+        log.warning(str(e))
+        if normalization != "NONE":
+            log.warning("Try to read unbalanced matrix.")
+            normalization = "NONE"
+            try:
+                slist = strawC.strawC(normalization, path, chr1loc, chr2loc, 'BP', binsize)
+            except Exception as e:
+                log.warning("Failed.")
+                log.warning(str(e))
+            log.warning("Unbalanced matrix is readed.")
+    return normalization, slist
+
+
+def _fill_matrix(mat, loc1, loc2, vals, start1, start2, binsize, is_cis):
+    """Scatter contacts into the matrix in one typed loop, skip the ones outside of it."""
+    n1, n2 = mat.shape
+    # contacts are distinct pixels, so the iterations write different cells
+    for i in prange(vals.shape[0]):
+        bin1 = (loc1[i] - start1) // binsize
+        bin2 = (loc2[i] - start2) // binsize
+        if 0 <= bin1 < n1 and 0 <= bin2 < n2:
+            mat[bin1, bin2] = vals[i]
+            if is_cis:
+                mat[bin2, bin1] = vals[i]
 
-        chrs = {}
-        resolutions = []
-        magic_string = struct.unpack(b'<3s', req.read(3))[0]
-        req.read(1)
-        if (magic_string != b"HIC"):
-            print('This does not appear to be a HiC file; '
-                  'magic string is incorrect')
-            sys.exit()
-        global version
-        version = struct.unpack(b'<i', req.read(4))[0]
-        masterindex = struct.unpack(b'<q', req.read(8))[0]
-        genome = b""
-        c = req.read(1)
-        while (c != b'\0'):
-            genome += c
-            c = req.read(1)
-        genome = genome.decode('ascii')
-        # metadata extraction
-        metadata = {}
-        nattributes = struct.unpack(b'<i', req.read(4))[0]
-        for _ in range(nattributes):
-            key = readcstr(req)
-            value = readcstr(req)
-            metadata[key] = value
-        nChrs = struct.unpack(b'<i', req.read(4))[0]
-        for i in range(nChrs):
-            name = readcstr(req)
-            length = struct.unpack(b'<i', req.read(4))[0]
-            if name and length:
-                chrs[i] = [i, name, length]
-        nBpRes = struct.unpack(b'<i', req.read(4))[0]
-        # find bp delimited resolutions supported by the hic file
-        for _ in range(nBpRes):
-            res = struct.unpack(b'<i', req.read(4))[0]
-            resolutions.append(res)
-        return chrs, resolutions, masterindex, genome, metadata
+
+if njit is not None:
+    _fill_matrix_parallel = njit(cache=True, nogil=True, parallel=True)(_fill_matrix)
+    _fill_matrix = njit(cache=True, nogil=True)(_fill_matrix)
+else:
+    # fallback to the numpy fancy indexing
+    _fill_matrix = _fill_matrix_parallel = None
 
 
 class CoolerWrap(object):
@@ -239,51 +352,42 @@ class CoolerWrap(object):
     """
 
     def __init__(self, path, binsize='auto', balance=True):
-        import cooler
-        from .tools import is_multi_cool, get_cooler_resolutions
         self.path = path
+        self._mtime = osp.getmtime(path.partition("::")[0])
 
         self.is_multi = is_multi_cool(path)
         self.resolutions = get_cooler_resolutions(path, self.is_multi)
         if self.is_multi:
-            self.coolers = self.__load_multi_coolers(path)
+            # coolers of resolutions are opened on the first use
+            self._cooler_uris = self.__multi_cooler_uris(path)
+            self._coolers = {}
         else:
-            self.cool = cooler.Cooler(path)
+            self.cool = _open_cooler(path, self._mtime)
+        self._chromnames = None
 
         self.binsize = binsize
         self.balance = balance
 
-    def __load_multi_coolers(self, path):
-        from collections import OrderedDict
-        import cooler
-
-        def cooler_reso(resolution):
-            from h5py import File
-            with File(path, 'r') as f:
-                if "resolutions" in f:
-                    c = cooler.Cooler(path + "::/resolutions/{}".format(resolution))
-                else:
-                    for grp_name in f:
-                        grp = f[grp_name]
-                        if str(grp.attrs['bin-size']) == str(resolution):
-                            c = cooler.Cooler(path + "::{}".format(grp_name))
-                            break
-            return c
-
-        coolers = OrderedDict([(reso, cooler_reso(reso)) for reso in self.resolutions])
-        return coolers
+    def __multi_cooler_uris(self, path):
+        """Map resolutions to the cooler uris."""
+        return {reso: path + "::" + grp for reso, grp in get_cooler_groups(path).items()}
+
+    def get_cooler(self, resolution):
+        """Get the cooler.Cooler of a resolution in the multi-cooler file."""
+        if resolution not in self._coolers:
+            self._coolers[resolution] = _open_cooler(self._cooler_uris[resolution], self._mtime)
+        return self._coolers[resolution]
 
     def get_cool(self, genome_range):
         binsize = self.infer_binsize(genome_range)
-        cool = self.coolers[binsize] if self.is_multi else self.cool
+        cool = self.get_cooler(binsize) if self.is_multi else self.cool
         self.fetched_binsize = binsize  # expose fetched binsize
         return cool
 
     def infer_binsize(self, genome_range):
-        from .tools import infer_resolution
         genome_range = to_gr(genome_range)
         if self.is_multi:
-            resolutions = [k for k in self.coolers.keys()]
+            resolutions = self.resolutions
             if self.binsize == 'auto':
                 binsize = infer_resolution(genome_range, resolutions)
             else:
@@ -294,29 +398,53 @@ class CoolerWrap(object):
             binsize = self.cool.binsize
         return binsize
 
-    def fetch(self, genome_range1, genome_range2=None):
+    def _normalize_range(self, cool, genome_range):
+        """Convert to GenomeRange with the chromosome name used in the cooler file."""
+        if self._chromnames is None:
+            # resolutions of a multi-cooler share the chromosomes
+            self._chromnames = set(cool.chromnames)
+        genome_range = to_gr(genome_range)
+        if genome_range.chrom not in self._chromnames:
+            genome_range.change_chrom_names()
+        return genome_range
+
+    def fetch(self, genome_range1, genome_range2=None, sparse=False, dtype=np.float32):
+        """
+        Parameters
+        ----------
+        sparse : bool
+            Return a scipy.sparse.csr_matrix instead of a dense array.
+            default False
+
+        dtype : numpy.dtype
+            Data type of the matrix.
+            default numpy.float32
+
+        Return
+        ------
+        matrix : {numpy.ndarray, scipy.sparse.csr_matrix}
+            float32 by default, cooler gives float64 matrices,
+            pass dtype=numpy.float64 for exactly the same values as before.
+        """
         # TODO what if genome_ranges are invalid
         if genome_range2 is None:
             genome_range2 = genome_range1
 
         genome_range1 = to_gr(genome_range1)
-        genome_range2 = to_gr(genome_range2)
-
         cool = self.get_cool(genome_range1)
-
-        if genome_range1.chrom not in cool.chromnames:
-            genome_range1.change_chrom_names()
-        if genome_range2.chrom not in cool.chromnames:
-            genome_range2.change_chrom_names()
+        genome_range1 = self._normalize_range(cool, genome_range1)
+        genome_range2 = self._normalize_range(cool, genome_range2)
 
         try:
-            mat = cool.matrix(balance=self.balance).fetch(str(genome_range1), str(genome_range2))
+            mat = cool.matrix(balance=self.balance, sparse=sparse).fetch(str(genome_range1), str(genome_range2))
         except ValueError as e:
             log.warning(str(e))
             log.warning("Data is not balanced, force to use unbalanced matrix.")
-            mat = cool.matrix(balance=False).fetch(str(genome_range1), str(genome_range2))
+            mat = cool.matrix(balance=False, sparse=sparse).fetch(str(genome_range1), str(genome_range2))
 
-        return mat
+        if sparse:
+            mat = mat.tocsr()
+        return mat.astype(dtype, copy=False)
 
     def fetch_pixels(self, genome_range1, genome_range2=None, join=True):
         cool = self.get_cool(genome_range1)
@@ -324,10 +452,98 @@ class CoolerWrap(object):
         if genome_range2 is None:
             genome_range2 = genome_range1
 
-        if genome_range1.chrom not in cool.chromnames:
-            genome_range1.change_chrom_names()
-        if genome_range2.chrom not in cool.chromnames:
-            genome_range2.change_chrom_names()
+        genome_range1 = self._normalize_range(cool, genome_range1)
+        genome_range2 = self._normalize_range(cool, genome_range2)
 
         mat = cool.matrix(as_pixels=True, balance=self.balance, join=join)
         return mat.fetch(str(genome_range1), str(genome_range2))
+
+
+@lru_cache(maxsize=32)
+def _open_cooler(uri, mtime):
+    """cooler.Cooler of the uri, shared between wraps, it reads the chromosomes and info once."""
+    import cooler
+    return cooler.Cooler(uri, mode='r', **H5_OPEN_KWARGS)
+
+
+def _read_hic_header(path, mtime):
+    """
+    Read the header of the '.hic' file, set the module level `version` of the file.
+
+    Return
+    ------
+    (chrs, resolutions, masterindex, genome, metadata), see `_parse_hic_header`.
+    """
+    global version
+    version, *header = _parse_hic_header(path, mtime)
+    return tuple(header)
+
+
+@lru_cache(maxsize=32)
+def _parse_hic_header(path, mtime):
+    """
+    from hic2cool code:
+        https://github.com/4dn-dcic/hic2cool/blob/master/hic2cool/hic2cool_utils.py#L73
+
+    Takes in a .hic file and returns a dictionary containing information about
+    the chromosome. Keys are chromosome index numbers (0 through # of chroms
+    contained in file) and values are (chr idx (int), chr name (str), chrom
+    length (int)). Returns the version, masterindex, resolutions, genome and
+    metadata of the file as well.
+
+    The result is shared between calls, the mappings and sequences in it are read-only.
+    """
+
+    with open(path, 'rb') as req:
+        # parse from a buffer read in bulk, extend it when the header is longer
+        buf = req.read(_HEADER_CHUNK)
+        offset = 0
+
+        def extend():
+            nonlocal buf
+            more = req.read(_HEADER_CHUNK)
+            if not more:
+                raise EOFError("Unexpected end of file while reading the header of {}".format(path))
+            buf += more
+
+        def unpack(st):
+            nonlocal offset
+            while offset + st.size > len(buf):
+                extend()
+            values = st.unpack_from(buf, offset)
+            offset += st.size
+            return values
+
+        def cstr():
+            nonlocal offset
+            end = buf.find(b'\0', offset)
+            while end < 0:
+                extend()
+                end = buf.find(b'\0', offset)
+            value = buf[offset:end].decode('utf-8')
+            offset = end + 1
+            return value
+
+        chrs = {}
+        magic_string, version_, masterindex = unpack(_HIC_HEAD)
+        if (magic_string != b"HIC"):
+            print('This does not appear to be a HiC file; '
+                  'magic string is incorrect')
+            sys.exit()
+        genome = cstr()
+        # metadata extraction
+        metadata = {}
+        nattributes, = unpack(_INT)
+        for _ in range(nattributes):
+            key = cstr()
+            metadata[key] = cstr()
+        nChrs, = unpack(_INT)
+        for i in range(nChrs):
+            name = cstr()
+            length, = unpack(_INT)
+            if name and length:
+                chrs[i] = (i, name, length)
+        nBpRes, = unpack(_INT)
+        # find bp delimited resolutions supported by the hic file
+        resolutions = unpack(struct.Struct('<{}i'.format(nBpRes)))
+    return version_, MappingProxyType(chrs), resolutions, masterindex, genome, MappingProxyType(metadata)
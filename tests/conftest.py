@@ -9,16 +9,17 @@ DATA_DIR = f"{HERE}/test_data"
 
 
 def clear_bgz_and_indexes():
-    exts = ['bgz', 'tbi', 'px2', 'bai']
-    files = os.listdir(DATA_DIR)
-    for f in files:
-        for ext in exts:
-            if f.endswith('.'+ext):
-                os.remove(f"{DATA_DIR}/{f}")
+    exts = ('.bgz', '.tbi', '.px2', '.bai')
+    with os.scandir(DATA_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith(exts) and entry.is_file():
+                os.remove(entry.path)
 
 
 def pytest_sessionstart(session):
     clear_bgz_and_indexes()
+    # also for the cli subprocesses, skip the probing of gui backends
+    os.environ.setdefault("MPLBACKEND", "Agg")
     import matplotlib
     matplotlib.use("Agg")
 
@@ -27,6 +28,14 @@ def pytest_sessionfinish(session):
     clear_bgz_and_indexes()
 
 
+@pytest.fixture(autouse=True)
+def close_figures():
+    # release the figures created by the test, they are never shown
+    yield
+    import matplotlib.pyplot as plt
+    plt.close('all')
+
+
 @pytest.fixture
 def data_dir():
     return DATA_DIR
@@ -9,7 +9,7 @@ test_itv = test_interval.replace(':', '_').replace('-', '_')
 empty_interval = "chr1:4000000-6000000"
 
 
-def test_browser():
+def test_browser(tmp_dir):
     frame = XAxis() + \
             Cool(f"{DATA_DIR}/cool_{test_itv}.mcool") + \
             Spacer(1) + \
@@ -22,10 +22,10 @@ def test_browser():
             BED(f"{DATA_DIR}/bed_{test_itv}.bed") + TrackHeight(10)
     bsr = Browser(frame)
     bsr.goto(test_interval)
-    tmp = "/tmp/test_coolbox_bsr.pdf"
+    tmp = f"{tmp_dir}/test_coolbox_bsr.pdf"
     bsr.save(tmp)
     bsr.goto(empty_interval)
-    tmp = "/tmp/test_coolbox_bsr_empty.pdf"
+    tmp = f"{tmp_dir}/test_coolbox_bsr_empty.pdf"
     bsr.save(tmp)
 
 
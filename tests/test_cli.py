@@ -1,24 +1,35 @@
 import os.path as osp
 import subprocess as subp
 
+import fire
+
+from coolbox.cli import CLI
+
 HERE = osp.dirname(osp.abspath(__file__))
 test_interval = "chr9:4000000-6000000"
 empty_interval = "chr10:4000000-6000000"
 test_itv = test_interval.replace(':', '_').replace('-', '_')
 
 
+def run_cli(args):
+    # run the command chain in this interpreter, avoid the startup and imports of a new process
+    print(" ".join(args))
+    fire.Fire(CLI, command=args)
+
+
 def test_cli_plot(data_dir, tmp_dir):
-    cmd = [
-        "python", "-m", "coolbox.cli",
+    run_cli([
         "add", "XAxis", "-",
         "add", "BigWig", f"{data_dir}/bigwig_{test_itv}.bw", "-",
         "add", "BedGraph", f"{data_dir}/bedgraph_{test_itv}.bg", "-",
         "add", "GTF", f"{data_dir}/gtf_{test_itv}.gtf", "-",
         "goto", test_interval, "-",
-        "plot", "/tmp/test_coolbox.pdf",
-    ]
-    subp.check_call(cmd)
+        "plot", f"{tmp_dir}/test_coolbox.pdf",
+    ])
+
 
+def test_cli_shell(data_dir, tmp_dir):
+    # keep one run through the shell, to cover the `python -m coolbox.cli` entry
     cmd = f"""
         python -m coolbox.cli
           joint_view top - 
@@ -41,30 +52,22 @@ def test_cli_plot(data_dir, tmp_dir):
 
 
 def test_cli_gen_notebook(data_dir, tmp_dir):
-    cmd = [
-        "python", "-m", "coolbox.cli",
+    run_cli([
         "add", "XAxis", "-",
         "add", "BigWig", f"{data_dir}/bigwig_{test_itv}.bw", "-",
         "add", "BedGraph", f"{data_dir}/bedgraph_{test_itv}.bg", "-",
         "add", "GTF", f"{data_dir}/gtf_{test_itv}.gtf", "-",
         "goto", test_interval, "-",
         "gen_notebook", f"{tmp_dir}/test_coolbox.ipynb",
-    ]
-    cmd = " ".join(cmd)
-    print(cmd)
-    subp.check_call(cmd, shell=True)
+    ])
 
 
 def test_cli_import_custom(tmp_dir):
     custom_path = osp.join(HERE, "custom_track.py")
-    cmd = [
-        "python", "-m", "coolbox.cli",
+    run_cli([
         "load_module", custom_path, "-",
         "add", "XAxis", "-",
         "add", "CustomTrack", "-",
         "goto", test_interval, "-",
         "plot", f"{tmp_dir}/test_coolbox_custom.pdf"
-    ]
-    cmd = " ".join(cmd)
-    print(cmd)
-    subp.check_call(cmd, shell=True)
+    ])
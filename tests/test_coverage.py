@@ -8,7 +8,7 @@ def test_vlines(test_interval, tmp_dir):
     with vlines:
         frame = XAxis() + XAxis()
     fig = frame.plot(test_interval)
-    fig.savefig(f"{tmp_dir}/test_coolbox_vline.pdf")
+    fig.savefig(f"{tmp_dir}/test_coolbox_vline.png")
 
 
 def test_highlights(test_interval, tmp_dir):
@@ -19,7 +19,7 @@ def test_highlights(test_interval, tmp_dir):
     with highlights:
         frame = XAxis() + XAxis()
     fig = frame.plot(test_interval, close_fig=False)
-    fig.savefig(f"{tmp_dir}/test_coolbox_highlights.pdf")
+    fig.savefig(f"{tmp_dir}/test_coolbox_highlights.png")
 
 
 def test_bigwig_coverage(data_dir, test_itv, test_interval, tmp_dir):
@@ -28,7 +28,7 @@ def test_bigwig_coverage(data_dir, test_itv, test_interval, tmp_dir):
         BigWigCoverage(f"{data_dir}/bigwig_{test_itv}.bw", style="fill", color="red", alpha=0.3) +\
         BigWigCoverage(f"{data_dir}/bigwig_{test_itv}.bw", style="fill", color="blue", alpha=0.3)
     fig = frame.plot(test_interval)
-    fig.savefig(f"{tmp_dir}/test_coolbox_bwcov.pdf")
+    fig.savefig(f"{tmp_dir}/test_coolbox_bwcov.png")
 
 
 def test_arcs_coverage(data_dir, test_itv, test_interval, tmp_dir):
@@ -36,7 +36,7 @@ def test_arcs_coverage(data_dir, test_itv, test_interval, tmp_dir):
         BigWig(f"{data_dir}/bigwig_{test_itv}.bw", style="fill", alpha=0.5) + \
         ArcsCoverage(f"{data_dir}/bedpe_{test_itv}.bedpe")
     fig = frame.plot(test_interval)
-    fig.savefig(f"{tmp_dir}/test_coolbox_arcscov.pdf")
+    fig.savefig(f"{tmp_dir}/test_coolbox_arcscov.png")
 
 
 def test_tad_coverage(data_dir, test_itv, test_interval, tmp_dir):
@@ -44,7 +44,7 @@ def test_tad_coverage(data_dir, test_itv, test_interval, tmp_dir):
         Cool(f"{data_dir}/cool_{test_itv}.mcool") + \
         TADCoverage(f"{data_dir}/tad_{test_itv}.bed")
     fig = frame.plot(test_interval)
-    fig.savefig(f"{tmp_dir}/test_coobox_tadcov.pdf")
+    fig.savefig(f"{tmp_dir}/test_coobox_tadcov.png")
 
 
 if __name__ == '__main__':
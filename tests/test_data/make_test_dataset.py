@@ -15,12 +15,18 @@ r_ = REGION[3:]
 def extract_bigwig(source, target, chr, start, end):
     # https://bioinfocore.com/blogs/extract-subset-bigwig-file-for-a-given-genomic-region/
     import pyBigWig
+    if os.path.exists(target) and os.path.getmtime(target) > os.path.getmtime(source):
+        # extracted from the current source already
+        return
     bw_in = pyBigWig.open(source)
     bw_out = pyBigWig.open(target, 'w')
     bw_out.addHeader([(chr, bw_in.chroms()[chr])])
 
-    for x in bw_in.intervals(chr, start, end):
-        bw_out.addEntries([chr], [x[0]], ends=[x[1]], values=[x[2]])
+    intervals = bw_in.intervals(chr, start, end)
+    if intervals:
+        # add all the intervals in one call
+        starts, ends, values = (list(col) for col in zip(*intervals))
+        bw_out.addEntries([chr] * len(starts), starts, ends=ends, values=values)
 
     bw_in.close()
     bw_out.close()
@@ -47,40 +53,46 @@ if False:
         "gtf": "~/DATA1/Genomes/Homo_sapiens/hg19/Homo_sapiens.GRCh37.75.chr.gtf.gz",
     }
 
+    from concurrent.futures import ThreadPoolExecutor
+    NPROC = os.cpu_count()
+
     # chr size
     system(f"cp {sources['chr_size']} .")
 
-    # cooler
-    system(f"coolclip {sources['cool']} cool_{REGION_MARK}.cool {r_}")
-    system(f"cooler zoomify --balance cool_{REGION_MARK}.cool -o cool_{REGION_MARK}.mcool")
-    system(f"rm cool_{REGION_MARK}.cool")
-
-    # bigwig and bam
-    out_bam = f"bam_{REGION_MARK}.bam"
-    with pysam.AlignmentFile(sources['bam'], 'rb') as bam_in:
-        with pysam.AlignmentFile(out_bam, 'wb', template=bam_in) as bam_out:
-            for read in bam_in.fetch(CHR, START, END):
-                bam_out.write(read)
-    bw = f"bigwig_{REGION_MARK}.bw"
-    system(f"samtools index {out_bam}")
-    system(f"bamCoverage --bam {out_bam} -o {bw} --binSize 1000")
-
-    # bed
-    system(f"cp {sources['bed']} .")
-    bed_source = os.path.basename(sources['bed'])
-    system(f"bgzip {bed_source}")
-    system(f"tabix -p bed {bed_source}.gz")
-    system(f"tabix {bed_source}.gz {REGION} > bed_{REGION_MARK}.bed")
-    system(f"rm {bed_source}.gz {bed_source}.gz.tbi")
-
-    # arcs
-    system(f"cp {sources['arcs']} .")
-    arcs_source = os.path.basename(sources['arcs'])
-    system(f"sortBed -i {arcs_source} > {arcs_source}.sorted")
-    system(f"bgzip {arcs_source}.sorted")
-    system(f"tabix -p bed {arcs_source}.sorted.gz")
-    system(f"tabix {arcs_source}.sorted.gz {r_} > arcs_{REGION_MARK}.arcs")
-    system(f"rm {arcs_source} {arcs_source}.sorted.gz {arcs_source}.sorted.gz.tbi")
-
-    # gtf
-    system(f"tabix {sources['gtf']} {REGION} > gtf_{REGION_MARK}.gtf")
+    # the pipelines of tracks are independent, run them concurrently
+    def build_cool():
+        system(f"coolclip {sources['cool']} cool_{REGION_MARK}.cool {r_}")
+        system(f"cooler zoomify --balance cool_{REGION_MARK}.cool -o cool_{REGION_MARK}.mcool")
+        system(f"rm cool_{REGION_MARK}.cool")
+
+    def build_bam():
+        # bigwig and bam, the reads are copied by htslib instead of a python loop
+        out_bam = f"bam_{REGION_MARK}.bam"
+        pysam.view("-b", "-h", "-o", out_bam, sources['bam'], REGION, catch_stdout=False)
+        bw = f"bigwig_{REGION_MARK}.bw"
+        system(f"samtools index -@ {NPROC} {out_bam}")
+        system(f"bamCoverage --bam {out_bam} -o {bw} --binSize 1000")
+
+    def build_bed():
+        system(f"cp {sources['bed']} .")
+        bed_source = os.path.basename(sources['bed'])
+        system(f"bgzip -@ {NPROC} {bed_source}")
+        system(f"tabix -p bed {bed_source}.gz")
+        system(f"tabix {bed_source}.gz {REGION} > bed_{REGION_MARK}.bed")
+        system(f"rm {bed_source}.gz {bed_source}.gz.tbi")
+
+    def build_arcs():
+        system(f"cp {sources['arcs']} .")
+        arcs_source = os.path.basename(sources['arcs'])
+        system(f"sortBed -i {arcs_source} > {arcs_source}.sorted")
+        system(f"bgzip -@ {NPROC} {arcs_source}.sorted")
+        system(f"tabix -p bed {arcs_source}.sorted.gz")
+        system(f"tabix {arcs_source}.sorted.gz {r_} > arcs_{REGION_MARK}.arcs")
+        system(f"rm {arcs_source} {arcs_source}.sorted.gz {arcs_source}.sorted.gz.tbi")
+
+    def build_gtf():
+        system(f"tabix {sources['gtf']} {REGION} > gtf_{REGION_MARK}.gtf")
+
+    builders = [build_cool, build_bam, build_bed, build_arcs, build_gtf]
+    with ThreadPoolExecutor(max_workers=len(builders)) as ex:
+        list(ex.map(lambda build: build(), builders))
@@ -9,7 +9,7 @@ test_itv = test_interval.replace(':', '_').replace('-', '_')
 empty_interval = "chr1:4000000-6000000"
 
 
-def test_frame():
+def test_frame(tmp_dir):
     frame = XAxis() + \
             Cool(f"{DATA_DIR}/cool_{test_itv}.mcool") + \
             Spacer(1) + \
@@ -25,7 +25,7 @@ def test_frame():
     fig = frame.plot(test_interval)
     frame_data = frame.fetch_data()
     assert frame_data is not None
-    tmp = "/tmp/test_coolbox_fig.pdf"
+    tmp = f"{tmp_dir}/test_coolbox_fig.pdf"
     fig.savefig(tmp)
     # browser
     bsr = Browser(frame)
@@ -35,5 +35,5 @@ def test_frame():
 
     # empty interval
     fig = frame.plot(empty_interval)
-    tmp = "/tmp/test_coolbox_fig_empty.pdf"
+    tmp = f"{tmp_dir}/test_coolbox_fig_empty.pdf"
     fig.savefig(tmp)
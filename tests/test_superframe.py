@@ -9,7 +9,7 @@ empty_interval = "chr10:4000000-6000000"
 test_itv = test_interval.replace(':', '_').replace('-', '_')
 
 
-def test_joint_view():
+def test_joint_view(tmp_dir):
     frame1 = XAxis() + GTF(f"{DATA_DIR}/gtf_{test_itv}.gtf") + Title("GTF")
     frame1 += BigWig(f"{DATA_DIR}/bigwig_{test_itv}.bw") + TrackHeight(2) + MinValue(0)
     frame2 = XAxis()
@@ -26,7 +26,7 @@ def test_joint_view():
 
     jv = JointView(cool1, **sub_frames, space=0, padding_left=0)
     fig = jv.plot("chr9:4500000-5000000", "chr9:5200000-5850000")
-    fig.save("/tmp/test_coolbox_joint_view.svg")
+    fig.save(f"{tmp_dir}/test_coolbox_joint_view.svg")
 
     tracks_data = jv.fetch_data()
     for pos, fr in sub_frames.items():
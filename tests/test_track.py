@@ -1,5 +1,5 @@
-import os
-import os.path as osp
+from io import BytesIO
+
 import pandas as pd
 
 from coolbox.api import *
@@ -25,11 +25,12 @@ def test_bed(data_dir, test_interval, test_itv, empty_interval):
     path = f"{data_dir}/bed_{test_itv}.bed"
     bed = BED(path)
     df = bed.fetch_data(test_interval)
-    count = 0
-    with open(path) as f:
-        for line in f:
-            if not line.startswith("#"):
-                count += 1
+    with open(path, 'rb') as f:
+        buf = f.read()
+    # count the lines not starting with '#' from the line breaks
+    n_lines = buf.count(b"\n") + (0 if buf.endswith(b"\n") or not buf else 1)
+    n_comments = buf.count(b"\n#") + buf.startswith(b"#")
+    count = n_lines - n_comments
     assert df.shape[0] == count
     fig, ax = plt.subplots()
     bed.plot(ax, test_interval)
@@ -79,20 +80,18 @@ def test_gtf(data_dir, test_interval, test_itv, empty_interval):
 
 
 def test_bam(data_dir, test_interval, test_itv, empty_interval):
+    # the index is removed at the start of the session, built by the first BAM track
     bam_path = f"{data_dir}/bam_{test_itv}.bam"
-    bai_path = bam_path + ".bai"
-    if osp.exists(bai_path):
-        os.remove(bai_path)
     bam = BAM(bam_path, plot_type="alignment")
     assert bam.fetch_data(test_interval) is not None
     fig, ax = plt.subplots()
     small_interval = GenomeRange("chr9:4998535-5006343")
     bam.plot(ax, small_interval)
-    fig.savefig("/tmp/test_coolbox_bam.pdf")
+    fig.savefig(BytesIO(), format="raw", dpi=50)
     bam = BAM(bam_path, plot_type="coverage")
     fig, ax = plt.subplots()
     bam.plot(ax, test_interval)
-    fig.savefig("/tmp/test_coolbox_bam_typecov.pdf")
+    fig.savefig(BytesIO(), format="raw", dpi=50)
     bam.fetch_data(empty_interval)
 
 
@@ -103,7 +102,7 @@ def test_bedgraph(data_dir, test_interval, test_itv, empty_interval):
     bg.fetch_data(empty_interval)
     fig, ax = plt.subplots()
     bg.plot(ax, test_interval)
-    fig.savefig("/tmp/test_coolbox_bg.pdf")
+    fig.savefig(BytesIO(), format="raw", dpi=50)
 
 
 def test_tads(data_dir, test_interval, test_itv, empty_interval):
@@ -0,0 +1,321 @@
+import os
+import gzip
+
+import pytest
+
+from coolbox.utilities import fmtconvert, GenomeRange
+from coolbox.utilities.fmtconvert import refgene_txt_to_bed12
+
+
+REFGENE_LINES = ["\t".join(fields) for fields in [
+    ("585", "NR_046018", "chr1", "+", "11873", "14409", "14409", "14409", "3",
+     "11873,12612,13220,", "12227,12721,14409,", "0", "DDX11L1", "unk", "unk", "-1,-1,-1,"),
+    ("585", "NR_024540", "chr1", "-", "14361", "29370", "29370", "29370", "11",
+     "14361,14969,15795,16606,16857,17232,17605,17914,18267,24737,29320,",
+     "14829,15038,15947,16765,17055,17368,17742,18061,18366,24891,29370,",
+     "0", "NA", "unk", "unk", "-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,"),
+    ("1", "NM_001005484", "chr1", "+", "69090", "70008", "69090", "70008", "1",
+     "69090,", "70008,", "0", "null", "cmpl", "cmpl", "0,"),
+    # exon lists without the tailing comma
+    ("2", "NR_106918", "chr9", "-", "4000100", "4002200", "4002200", "4002200", "2",
+     "4000100,4001900", "4000500,4002200", "0", "NaN", "unk", "unk", "-1,-1"),
+]]
+
+
+def baseline_bed12_line(line):
+    """The reference per line conversion, a bed12 line for each refGene line."""
+    items = line.strip().split("\t")
+    chrom, strand, start, end = items[2], items[3], items[4], items[5]
+    starts = [int(i) for i in items[9].split(",") if i]
+    ends = [int(i) for i in items[10].split(",") if i]
+    block_starts = ",".join(str(i - int(start)) for i in starts) + ","
+    block_sizes = ",".join(str(e - s) for s, e in zip(starts, ends)) + ","
+    return "\t".join((chrom, start, end, items[12], items[11], strand, start, end, "0",
+                      items[8], block_sizes, block_starts))
+
+
+@pytest.fixture
+def refgene_txt(tmp_path):
+    path = tmp_path / "refGene.txt"
+    path.write_text("\n".join(REFGENE_LINES) + "\n")
+    return path
+
+
+def test_refgene_txt_to_bed12(refgene_txt, tmp_path):
+    bed = tmp_path / "refGene.bed"
+    refgene_txt_to_bed12(str(refgene_txt), str(bed))
+    expected = [baseline_bed12_line(line) for line in REFGENE_LINES]
+    lines = bed.read_text().splitlines()
+    assert lines == expected
+    # names like NA and null are kept as they are
+    assert [line.split("\t")[3] for line in lines] == ["DDX11L1", "NA", "null", "NaN"]
+
+
+def test_refgene_txt_to_bed12_gzip(refgene_txt, tmp_path):
+    gz = tmp_path / "refGene.txt.gz"
+    gz.write_bytes(gzip.compress(refgene_txt.read_bytes()))
+    plain, compressed = tmp_path / "plain.bed", tmp_path / "gz.bed"
+    refgene_txt_to_bed12(str(refgene_txt), str(plain))
+    refgene_txt_to_bed12(str(gz), str(compressed))
+    assert compressed.read_text() == plain.read_text()
+    # gzip content without the suffix is detected by the magic number
+    no_suffix = tmp_path / "refGene_gz.txt"
+    no_suffix.write_bytes(gz.read_bytes())
+    refgene_txt_to_bed12(str(no_suffix), str(compressed), n_workers=2)
+    assert compressed.read_text() == plain.read_text()
+
+
+def test_refgene_txt_to_bed12_workers(refgene_txt, tmp_path, monkeypatch):
+    # a size not divisible by the workers, range boundaries fall in the middle of lines
+    refgene_txt.write_text("\n".join(REFGENE_LINES * 25) + "\n")
+    size = refgene_txt.stat().st_size
+    assert size % 3
+    ranges = fmtconvert._line_aligned_ranges(str(refgene_txt), 3)
+    assert len(ranges) == 3
+    assert ranges[0][0] == 0 and ranges[-1][1] == size
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(ranges[:-1], ranges[1:]))
+    assert any(size * i // 3 != start for i, (start, _) in enumerate(ranges))
+
+    monkeypatch.setattr(fmtconvert, "_PARALLEL_MIN_BYTES", 1)
+    serial, parallel = tmp_path / "serial.bed", tmp_path / "parallel.bed"
+    refgene_txt_to_bed12(str(refgene_txt), str(serial), n_workers=1)
+    refgene_txt_to_bed12(str(refgene_txt), str(parallel), n_workers=3)
+    assert parallel.read_text() == serial.read_text()
+    assert len(serial.read_text().splitlines()) == len(REFGENE_LINES) * 25
+
+
+def test_genome_range_change_chrom_names():
+    gr = GenomeRange("chr1:1000-2000")
+    assert str(gr) == "chr1:1000-2000" and hash(gr) == hash(("chr1", 1000, 2000))
+    gr.change_chrom_names()
+    assert str(gr) == "1:1000-2000"
+    assert hash(gr) == hash(GenomeRange("1:1000-2000"))
+
+
+def _make_tabix_bed(path, lines):
+    import pysam
+    path.write_text("".join(f"{chrom}\t{start}\t{end}\n" for chrom, start, end in lines))
+    return pysam.tabix_index(str(path), preset="bed", force=True)
+
+
+def test_tabix_query(tmp_path):
+    pytest.importorskip("pysam")
+    from coolbox.utilities.bed import tabix_query
+    bgz = _make_tabix_bed(tmp_path / "a.bed", [("chr1", i * 100, i * 100 + 50) for i in range(10)])
+    # interleaved queries on the shared handle
+    it1 = tabix_query(bgz, "chr1", 0, 500)
+    it2 = tabix_query(bgz, "chr1", 500, 1000)
+    rows = [row for pair in zip(it1, it2) for row in pair]
+    assert [int(row[1]) for row in rows] == [0, 500, 100, 600, 200, 700, 300, 800, 400, 900]
+    assert list(tabix_query(bgz, "chr2", 0, 500)) == []
+
+    # the rebuilt file is opened again
+    mtime = os.path.getmtime(bgz)
+    bgz = _make_tabix_bed(tmp_path / "a.bed", [("chr1", 10, 20)])
+    os.utime(bgz, (mtime + 10, mtime + 10))
+    assert list(tabix_query(bgz, "chr1", 0, 1000)) == [["chr1", "10", "20"]]
+
+
+def test_straw_arrays_cache_bytes():
+    import numpy as np
+    from coolbox.utilities.hic.wrap import _ArraysCache
+    cache = _ArraysCache(max_bytes=3 * 800)
+
+    def item():
+        return "NONE", (np.zeros(100), np.zeros(0), np.zeros(0))  # 800 bytes
+
+    for key in "abc":
+        cache.put(key, item())
+    cache.get("a")
+    cache.put("d", item())
+    # the least recently used is evicted
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.nbytes == 3 * 800
+    # items larger than the whole cache are not kept
+    cache.put("e", ("NONE", (np.zeros(1000),)))
+    assert cache.get("e") is None and cache.nbytes == 3 * 800
+
+
+def test_read_hic_header(data_dir):
+    import os.path as osp
+    from coolbox.utilities.hic import wrap
+    path = osp.realpath(f"{data_dir}/dothic_chr9_4000000_6000000.hic")
+    chrs, resolutions, _, _, metadata = wrap._read_hic_header(path, osp.getmtime(path))
+    assert wrap.version == 8
+    assert 5000 in resolutions
+    with pytest.raises(TypeError):
+        chrs[0] = None
+    with pytest.raises(TypeError):
+        metadata["key"] = "value"
+    # the version is also set when the header is cached
+    wrap.version = None
+    assert wrap._read_hic_header(path, osp.getmtime(path))[0] is chrs
+    assert wrap.version == 8
+
+
+@pytest.mark.parametrize("norm", ["NONE", "KR", "VC"])
+@pytest.mark.parametrize("binsize", [25000, 50000])
+def test_straw(data_dir, norm, binsize):
+    import numpy as np
+    from coolbox.utilities.hic.straw import straw
+    # records read by the original straw implementation, sorted by bins
+    ref = np.load(f"{data_dir}/dothic_chr9_4000000_6000000_straw.npz")
+    matrix = straw(f"{data_dir}/dothic_chr9_4000000_6000000.hic").getNormalizedMatrix(
+        '9', '9', norm, 'BP', binsize)
+    s, e = 4000000 // binsize, 6000000 // binsize
+    binX, binY, counts = matrix.getDataFromBinRegion(s, e, s, e)
+    order = np.lexsort((binY, binX))
+    assert np.array_equal(binX[order], ref[f"{norm}_{binsize}_x"])
+    assert np.array_equal(binY[order], ref[f"{norm}_{binsize}_y"])
+    assert np.array_equal(counts[order], ref[f"{norm}_{binsize}_counts"], equal_nan=True)
+
+
+def test_merge_block_ranges():
+    from coolbox.utilities.hic.straw import mergeBlockRanges
+    # overlapping, unsorted
+    assert mergeBlockRanges([(50, 100, 2), (0, 100, 1)], maxGap=0) == \
+        [(0, 149, [(0, 100, 1), (50, 100, 2)])]
+    # adjacent
+    assert mergeBlockRanges([(0, 100, 1), (100, 50, 2)], maxGap=0) == \
+        [(0, 149, [(0, 100, 1), (100, 50, 2)])]
+    # contained in the previous block
+    assert mergeBlockRanges([(0, 100, 1), (10, 20, 2)], maxGap=0) == \
+        [(0, 99, [(0, 100, 1), (10, 20, 2)])]
+    # gaps larger than maxGap split the ranges
+    assert mergeBlockRanges([(0, 100, 1), (101, 10, 2), (200, 10, 3)], maxGap=1) == \
+        [(0, 110, [(0, 100, 1), (101, 10, 2)]), (200, 209, [(200, 10, 3)])]
+    assert mergeBlockRanges([]) == []
+
+
+def test_straw_close(data_dir):
+    from coolbox.utilities.hic.straw import straw
+    with straw(f"{data_dir}/dothic_chr9_4000000_6000000.hic") as s:
+        mm = s.mm
+        with s.getNormalizedMatrix('9', '9', 'KR', 'BP', 50000) as matrix:
+            matrix.getDataFromBinRegion(80, 120, 80, 120)
+            executors = (matrix._executor, matrix._ioExecutor)
+            assert all(e is not None for e in executors)
+        assert all(e._shutdown for e in executors)
+        assert matrix.mm is None
+        with pytest.raises(ValueError):
+            matrix.getDataFromBinRegion(80, 120, 80, 120)
+    assert s.mm is None and mm.closed
+    with pytest.raises(ValueError):
+        s.getNormalizedMatrix('9', '9', 'KR', 'BP', 50000)
+
+
+def test_normalized_matrix_own_map(data_dir):
+    import numpy as np
+    from coolbox.utilities.hic.straw import straw, normalizedmatrix
+    with straw(f"{data_dir}/dothic_chr9_4000000_6000000.hic") as s:
+        shared = s.getNormalizedMatrix('9', '9', 'NONE', 'BP', 50000)
+        expected = shared.getDataFromBinRegion(80, 120, 80, 120)
+    # a matrix created without the map of a straw object maps the file itself
+    attrs = ('infile', 'is_synapse', 'binsize', 'isIntra', 'neededToFlipIndices', 'blockBinCount',
+             'blockColumnCount', 'blockMap', 'norm', 'c1Norm', 'c2Norm', 'version')
+    with normalizedmatrix(*(getattr(shared, a) for a in attrs)) as own:
+        mm = own.mm
+        result = own.getDataFromBinRegion(80, 120, 80, 120)
+    assert mm.closed
+    assert all(np.array_equal(a, b) for a, b in zip(result, expected))
+
+
+@pytest.mark.parametrize("regions", [
+    ("chr9:4500000-5500000", None),
+    ("chr9:4000000-5000000", "chr9:5000000-6000000"),
+    ("chr9:5000000-6000000", "chr9:4000000-5000000"),
+])
+@pytest.mark.parametrize("fmt", ["hic", "cool"])
+def test_hic_wrap_sparse(data_dir, fmt, regions):
+    import numpy as np
+    from coolbox.utilities.hic.wrap import StrawWrap, CoolerWrap
+    if fmt == "hic":
+        wrap = StrawWrap(f"{data_dir}/dothic_chr9_4000000_6000000.hic", binsize=25000)
+    else:
+        wrap = CoolerWrap(f"{data_dir}/cool_chr9_4000000_6000000.mcool", binsize=40000)
+    dense = wrap.fetch(*regions)
+    sparse = wrap.fetch(*regions, sparse=True)
+    assert sparse.format == "csr" and sparse.dtype == dense.dtype
+    assert np.array_equal(sparse.toarray(), np.nan_to_num(dense))
+
+
+@pytest.mark.parametrize("norm", ["NONE", "KR"])
+def test_straw_wrap_dtype(data_dir, norm):
+    import numpy as np
+    from coolbox.utilities.hic.wrap import StrawWrap
+    # matrices fetched by the StrawWrap before the dtype argument, they were float64
+    ref = np.load(f"{data_dir}/dothic_chr9_4000000_6000000_straw.npz")[f"{norm}_mat"]
+    wrap = StrawWrap(f"{data_dir}/dothic_chr9_4000000_6000000.hic", normalization=norm, binsize=25000)
+    mat = wrap.fetch("chr9:4500000-5500000", dtype=np.float64)
+    assert mat.dtype == np.float64
+    assert np.array_equal(mat, ref, equal_nan=True)
+    mat32 = wrap.fetch("chr9:4500000-5500000")
+    assert mat32.dtype == np.float32
+    assert np.array_equal(mat32, ref.astype(np.float32), equal_nan=True)
+
+
+def test_cooler_wrap_dtype(data_dir):
+    import numpy as np
+    import cooler
+    from coolbox.utilities.hic.wrap import CoolerWrap
+    from coolbox.utilities.hic.tools import get_cooler_groups
+    path = f"{data_dir}/cool_chr9_4000000_6000000.mcool"
+    region = "chr9:4500000-5500000"
+    uri = path + "::" + get_cooler_groups(path)[40000]
+    # chromosome names of the file are without 'chr'
+    ref = cooler.Cooler(uri).matrix(balance=True).fetch(region[3:])
+    wrap = CoolerWrap(path, binsize=40000)
+    mat = wrap.fetch(region, dtype=np.float64)
+    assert mat.dtype == np.float64
+    assert np.array_equal(mat, ref, equal_nan=True)
+    assert wrap.fetch(region).dtype == np.float32
+
+
+@pytest.mark.parametrize("region, expected", [
+    ("chr1:100-200", ("chr1", 100, 200)),
+    (" chr1:1,000-2,000 ", ("chr1", 1000, 2000)),
+    ("chr1: 100 - 200", ("chr1", 100, 200)),
+    ("chr1:100-200-300", ("chr1", 100, 200)),
+    ("chr1:(100)-{200}", ("chr1", 100, 200)),
+])
+def test_parse_region_string(region, expected):
+    assert GenomeRange.parse_region_string(region) == expected
+
+
+@pytest.mark.parametrize("region", ["chr1", "chr1:0", "chr1:1-2:3", "chr1:a-b", "chr1:-1-2", "chr1:1 2-3", None])
+def test_parse_region_string_error(region):
+    with pytest.raises(ValueError):
+        GenomeRange.parse_region_string(region)
+
+
+def test_genome_range_assign_fields():
+    from copy import copy
+    gr = GenomeRange("chr1", 1, 100)
+    str(gr), hash(gr)
+    gr.end = 500
+    assert str(gr) == "chr1:1-500"
+    assert gr == GenomeRange("chr1", 1, 500) and hash(gr) == hash(GenomeRange("chr1", 1, 500))
+    gr.chrom, gr.start = "chr2", 10
+    assert str(gr) == "chr2:10-500" and hash(gr) == hash(GenomeRange("chr2:10-500"))
+    # copies don't keep the memo of the original range after changing
+    gr2 = copy(gr)
+    gr2.start = 20
+    assert str(gr2) == "chr2:20-500" and str(gr) == "chr2:10-500"
+    assert {gr2: 1}[GenomeRange("chr2:20-500")] == 1
+
+
+def test_shifted_color_map():
+    import numpy as np
+    import matplotlib
+    from coolbox.utilities.figtools import shiftedColorMap
+    cmap1 = shiftedColorMap("RdBu", midpoint=0.75, name="shifted_test")
+    cmap2 = shiftedColorMap(matplotlib.colormaps["RdBu"], midpoint=0.75, name="shifted_test")
+    assert cmap1 is not cmap2
+    assert cmap1(0.3) == cmap2(0.3)
+    # the center of the colormap is shifted to the midpoint(within the lookup table resolution)
+    assert np.allclose(cmap1(0.75), matplotlib.colormaps["RdBu"](0.5), atol=0.02)
+    # changing the colormap of a caller doesn't affect the others
+    cmap1.set_bad("green")
+    assert cmap2.get_bad().tolist() != cmap1.get_bad().tolist()
+    assert shiftedColorMap("RdBu", midpoint=0.75, name="shifted_test").get_bad().tolist() == \
+        cmap2.get_bad().tolist()